@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmarks - timing, memory and repeatability for the search engine
+
+Usage: python bench.py [--repeat 5] [--only fit,score,search,stack,design,synthetic]
+       python bench.py --sizes 10000,100000,1000000 --only synthetic
+       python bench.py --json results.json
+       python bench.py --compare base.json results.json
+
+Groups:
+  fit        BM25.fit per domain
+  score      BM25.score and BM25.top_k per domain
+  search     search() cold (CSV parse + fit), disk-cached, warm (registry hit) and
+             cached (result-cache hit)
+  stack      search_stack() cold, warm and cached for every stack
+  design     generate_design_system() plain, with --persist, with --persist --page and with three pages
+  synthetic  fit/score/top_k on generated corpora of --sizes rows
+
+Every run except the "cached" ones starts with an empty result cache, and cold
+runs have it disabled, so they measure index loading and scoring rather than a
+cache lookup. Each benchmark reports min/median/mean/stdev over --repeat runs plus the peak
+traced allocation of one extra run (tracemalloc is kept out of the timed runs).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import core
+from core import AVAILABLE_STACKS, CSV_CONFIG, DATA_DIR, STACK_CONFIG, _STACK_COLS, create_bm25, resolve_backend, search, search_stack
+
+
+# ============ CONFIGURATION ============
+GROUPS = ["fit", "score", "search", "stack", "design", "synthetic"]
+DEFAULT_SIZES = [10000, 100000]
+
+QUERIES = {
+    "style": "glassmorphism dark mode modern",
+    "color": "saas fintech trust",
+    "chart": "real-time trend comparison",
+    "landing": "hero testimonial pricing conversion",
+    "product": "saas dashboard analytics",
+    "ux": "animation accessibility touch",
+    "typography": "elegant luxury serif",
+    "icons": "navigation arrow menu",
+    "react": "waterfall suspense bundle",
+    "web": "focus aria keyboard form",
+}
+STACK_QUERY = "responsive layout state performance"
+DESIGN_QUERY = "SaaS analytics dashboard for fintech"
+SYNTHETIC_QUERIES = 20
+
+
+# ============ MEASUREMENT ============
+def measure(fn, repeat, setup=None):
+    """Time fn() repeat times (setup() runs untimed before each), then trace one run's peak memory"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "min_ms": min(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "mean_ms": statistics.mean(times) * 1000,
+        "stdev_ms": statistics.stdev(times) * 1000 if len(times) > 1 else 0.0,
+        "cv": statistics.stdev(times) / statistics.mean(times) if len(times) > 1 and statistics.mean(times) else 0.0,
+        "peak_kb": peak / 1024,
+        "repeat": repeat,
+    }
+
+
+class _CacheDisabled:
+    """Context manager that turns the on-disk index cache, binary indexes and result cache off"""
+
+    def __enter__(self):
+        self.saved = core.CACHE_DIR, core.INDEX_DIR, core.RESULT_CACHE.max_entries
+        core.CACHE_DIR = core.INDEX_DIR = None
+        core.RESULT_CACHE.max_entries = 0
+
+    def __exit__(self, *exc):
+        core.CACHE_DIR, core.INDEX_DIR, core.RESULT_CACHE.max_entries = self.saved
+
+
+def _cold():
+    """setup= for cold and disk runs: nothing loaded, nothing cached"""
+    core.INDEX_REGISTRY.invalidate()
+    core.RESULT_CACHE.clear()
+
+
+def _documents(filepath, search_cols):
+    """Search-column documents of a CSV, as _build_index builds them"""
+    return core.ColumnStore.from_csv(filepath, search_cols).documents(search_cols)
+
+
+# ============ BENCHMARK GROUPS ============
+def bench_fit(repeat, backend):
+    for domain, config in CSV_CONFIG.items():
+        docs = _documents(DATA_DIR / config["file"], config["search_cols"])
+        yield f"fit/{domain}", {"docs": len(docs)}, measure(lambda: create_bm25(backend).fit(docs), repeat)
+
+
+def bench_score(repeat, backend):
+    for domain, config in CSV_CONFIG.items():
+        bm25 = create_bm25(backend)
+        bm25.fit(_documents(DATA_DIR / config["file"], config["search_cols"]))
+        query = QUERIES[domain]
+        yield f"score/{domain}", {"docs": bm25.N}, measure(lambda: bm25.score(query), repeat)
+        yield f"top_k/{domain}", {"docs": bm25.N, "k": core.MAX_RESULTS}, measure(lambda: bm25.top_k(query, core.MAX_RESULTS), repeat)
+
+
+def bench_search(repeat, backend):
+    for domain in CSV_CONFIG:
+        query = QUERIES[domain]
+        run = lambda: search(query, domain)
+        with _CacheDisabled():
+            yield f"search/cold/{domain}", {}, measure(run, repeat, setup=_cold)
+        if core.CACHE_DIR is not None:
+            search(query, domain)  # make sure the disk entry exists
+            yield f"search/disk/{domain}", {}, measure(run, repeat, setup=_cold)
+        yield f"search/warm/{domain}", {}, measure(run, repeat, setup=core.RESULT_CACHE.clear)
+        yield f"search/cached/{domain}", {}, measure(run, repeat)
+
+
+def bench_stack(repeat, backend):
+    for stack in AVAILABLE_STACKS:
+        run = lambda: search_stack(STACK_QUERY, stack)
+        with _CacheDisabled():
+            yield f"stack/cold/{stack}", {}, measure(run, repeat, setup=_cold)
+        yield f"stack/warm/{stack}", {}, measure(run, repeat, setup=core.RESULT_CACHE.clear)
+        yield f"stack/cached/{stack}", {}, measure(run, repeat)
+
+
+def bench_design(repeat, backend):
+    from design_system import generate_design_system
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        variants = [
+            ("design/plain", {}),
+            ("design/persist", {"persist": True, "output_dir": out_dir}),
+            ("design/persist+page", {"persist": True, "page": "dashboard", "output_dir": out_dir}),
+            ("design/persist+pages", {"persist": True, "page": ["dashboard", "settings", "checkout"], "output_dir": out_dir}),
+        ]
+        for name, kwargs in variants:
+            run = lambda: generate_design_system(DESIGN_QUERY, "Bench", **kwargs)
+            with _CacheDisabled():
+                yield f"{name}/cold", {}, measure(run, repeat, setup=_cold)
+            yield f"{name}/warm", {}, measure(run, repeat, setup=core.RESULT_CACHE.clear)
+
+
+def synthetic_corpus(size, seed=42):
+    """Zipf-distributed documents over the real data vocabulary, 20-80 tokens each"""
+    rng = random.Random(seed)
+    tokenizer = core.BM25()
+    vocab = set()
+    for config in list(CSV_CONFIG.values()) + [dict(_STACK_COLS, **s) for s in STACK_CONFIG.values()]:
+        for doc in _documents(DATA_DIR / config["file"], config["search_cols"]):
+            vocab.update(tokenizer.tokenize(doc))
+    vocab = sorted(vocab)
+    rng.shuffle(vocab)
+    weights = [1 / rank for rank in range(1, len(vocab) + 1)]
+
+    docs = []
+    for _ in range(size):
+        docs.append(" ".join(rng.choices(vocab, weights, k=rng.randint(20, 80))))
+    queries = [" ".join(rng.choices(vocab, weights, k=rng.randint(2, 5))) for _ in range(SYNTHETIC_QUERIES)]
+    return docs, queries
+
+
+def bench_synthetic(repeat, backend, sizes):
+    for size in sizes:
+        docs, queries = synthetic_corpus(size)
+        params = {"docs": size, "queries": len(queries)}
+        fit_repeat = max(1, repeat // 2) if size >= 100000 else repeat
+        yield f"synthetic/fit/{size}", params, measure(lambda: create_bm25(backend).fit(docs), fit_repeat)
+
+        bm25 = create_bm25(backend)
+        bm25.fit(docs)
+        yield f"synthetic/score/{size}", params, measure(lambda: [bm25.score(q) for q in queries], repeat)
+        yield f"synthetic/top_k/{size}", params, measure(lambda: [bm25.top_k(q, core.MAX_RESULTS) for q in queries], repeat)
+        yield f"synthetic/top_k_batch/{size}", params, measure(lambda: bm25.top_k_batch(queries, core.MAX_RESULTS), repeat)
+
+
+# ============ REPORTING ============
+def run(groups, repeat, backend, sizes, progress=sys.stderr):
+    """Run the selected groups; returns the JSON-serializable report"""
+    runners = {
+        "fit": bench_fit,
+        "score": bench_score,
+        "search": bench_search,
+        "stack": bench_stack,
+        "design": bench_design,
+        "synthetic": lambda r, b: bench_synthetic(r, b, sizes),
+    }
+    saved_backend = core.BM25_BACKEND
+    core.BM25_BACKEND = backend
+    results = []
+    try:
+        for group in groups:
+            for name, params, stats in runners[group](repeat, backend):
+                results.append({"name": name, "group": group, "params": params, **stats})
+                progress.write(f"  {name:<40} {stats['median_ms']:>10.3f} ms\n")
+    finally:
+        core.BM25_BACKEND = saved_backend
+        _cold()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": resolve_backend(backend),
+            "cache_dir": str(core.CACHE_DIR) if core.CACHE_DIR else None,
+            "repeat": repeat,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def format_report(report):
+    """Human-readable table of a report"""
+    meta = report["meta"]
+    lines = [
+        f"## Benchmarks ({meta['backend']} backend, Python {meta['python']}, repeat={meta['repeat']})",
+        "",
+        f"{'benchmark':<40} {'median ms':>10} {'min ms':>10} {'stdev ms':>10} {'cv':>6} {'peak KB':>10}",
+    ]
+    for r in report["results"]:
+        lines.append(f"{r['name']:<40} {r['median_ms']:>10.3f} {r['min_ms']:>10.3f} {r['stdev_ms']:>10.3f} {r['cv']:>6.1%} {r['peak_kb']:>10.1f}")
+    return "\n".join(lines)
+
+
+def format_comparison(base, new):
+    """Table of median times of two reports side by side (ratio < 1 means new is faster)"""
+    base_by_name = {r["name"]: r for r in base["results"]}
+    lines = [f"{'benchmark':<40} {'base ms':>10} {'new ms':>10} {'ratio':>7}"]
+    for r in new["results"]:
+        old = base_by_name.get(r["name"])
+        if old is None:
+            continue
+        ratio = r["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        lines.append(f"{r['name']:<40} {old['median_ms']:>10.3f} {r['median_ms']:>10.3f} {ratio:>7.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmarks")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Timed runs per benchmark (default: 5)")
+    parser.add_argument("--only", type=str, default=",".join(g for g in GROUPS if g != "synthetic"),
+                        help=f"Comma-separated groups: {', '.join(GROUPS)} (default: all but synthetic)")
+    parser.add_argument("--sizes", type=str, default=",".join(map(str, DEFAULT_SIZES)), help="Synthetic corpus sizes in rows")
+    parser.add_argument("--backend", choices=["python", "numpy"], default=None, help="BM25 backend (default: $UIPRO_BM25_BACKEND or python)")
+    parser.add_argument("--json", type=str, default=None, help="Write the machine-readable report to this file ('-' for stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two JSON reports instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            new = json.load(f)
+        print(format_comparison(base, new))
+        sys.exit(0)
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    report = run(groups, args.repeat, args.backend or core.BM25_BACKEND, sizes)
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        print(format_report(report))
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Self-Checks - the fast search paths against their reference implementations
+
+Usage: python check.py [--queries 60] [--seed 1] [--only topk,update]
+
+Checks (over every domain and stack CSV in DATA_DIR):
+  topk    BM25.top_k and top_k_batch (MaxScore pruning) on the python and, when
+          installed, numpy backends, the memory-mapped binary engines and the
+          federated index, against the positive head of score()
+  update  BM25.update() after edited, appended, deleted, duplicated and reordered
+          rows, and load_index(previous=) after CSV edits and header changes,
+          against a fresh fit of the new rows
+
+Prints one line per check and every mismatch found; exits 1 if any check failed.
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import core
+from core import DATA_DIR
+
+
+# ============ CONFIGURATION ============
+CHECKS = ["topk", "update"]
+KS = [1, 3, 10]
+UNKNOWN_WORDS = ["zzqx", "unknownword"]
+EPS = 1e-9  # score tolerance: engines may sum the same impacts in another order
+ENGINE_STATE = ["N", "avgdl", "doc_lengths", "norms", "postings", "doc_freqs", "idf", "max_impact"]
+
+
+# ============ DATA ============
+def data_files():
+    """(domain/stack name, file, search_cols, output_cols) of every domain and stack CSV"""
+    return [facet for facet in core._facets() if (DATA_DIR / facet[1]).exists()]
+
+
+def documents(filename, search_cols):
+    """Search-column documents of a CSV, as _build_index builds them"""
+    return core.ColumnStore.from_csv(DATA_DIR / filename, search_cols).documents(search_cols)
+
+
+def random_queries(bm25, count, rng):
+    """Queries of 1-5 index terms, sometimes repeated or mixed with unknown words"""
+    vocab = sorted(core.ANALYZER.tokens[term] for term in bm25.idf)
+    queries = []
+    for _ in range(count):
+        words = rng.choices(vocab, k=rng.randint(1, 5))
+        if rng.random() < 0.2:
+            words.append(rng.choice(words))
+        if rng.random() < 0.2:
+            words.append(rng.choice(UNKNOWN_WORDS))
+        queries.append(" ".join(words))
+    return queries
+
+
+# ============ COMPARISON ============
+def expected_top_k(bm25, query, k):
+    """Positive head of score(): the reference for top_k"""
+    return [(doc_id, score) for doc_id, score in bm25.score(query)[:k] if score > 0]
+
+
+def same_ranking(got, want):
+    """Same doc ids in the same order, with scores equal up to EPS"""
+    return (len(got) == len(want)
+            and all(g[0] == w[0] and abs(g[1] - w[1]) <= EPS for g, w in zip(got, want)))
+
+
+def state_diff(got, want):
+    """Names of the ENGINE_STATE attributes that differ between two engines (update() promises exact equality)"""
+    return [attr for attr in ENGINE_STATE if getattr(got, attr, None) != getattr(want, attr, None)]
+
+
+def _engines(filename, search_cols, output_cols, index_dir):
+    """(label, engine) of every BM25 engine available for one CSV"""
+    docs = documents(filename, search_cols)
+    engines = []
+    for backend in ["python", "numpy"]:
+        if core.resolve_backend(backend) != backend:
+            continue
+        bm25 = core.create_bm25(backend)
+        bm25.fit(docs)
+        engines.append((backend, bm25))
+
+    core.write_binary_index(DATA_DIR / filename, search_cols, index_dir)
+    saved, core.INDEX_DIR = core.INDEX_DIR, index_dir
+    try:
+        for backend in [label for label, _ in engines]:
+            index = core.open_binary_index(DATA_DIR / filename, search_cols, output_cols, backend)
+            engines.append((f"mapped-{backend}", index.bm25))
+    finally:
+        core.INDEX_DIR = saved
+    return engines
+
+
+# ============ CHECKS ============
+def check_topk(n_queries, rng):
+    """top_k/top_k_batch of every engine, and the federated index, against score()"""
+    reference = {}
+    with tempfile.TemporaryDirectory() as index_dir:
+        for name, filename, search_cols, output_cols in data_files():
+            engines = _engines(filename, search_cols, output_cols, index_dir)
+            queries = random_queries(engines[0][1], n_queries, rng)
+            reference[name] = (engines[0][1], queries)
+            for label, bm25 in engines:
+                failures = []
+                for k in KS:
+                    batch = bm25.top_k_batch(queries, k)
+                    for query, batched in zip(queries, batch):
+                        want = expected_top_k(bm25, query, k)
+                        got = bm25.top_k(query, k)
+                        if not same_ranking(got, want):
+                            failures.append(f"top_k({query!r}, {k}) = {got}, score() head = {want}")
+                        if not same_ranking(batched, got):
+                            failures.append(f"top_k_batch({query!r}, {k}) = {batched}, top_k = {got}")
+                yield f"topk/{label}/{filename}", len(queries) * len(KS), failures
+
+    federated = core.FederatedIndex()
+    for name, filename, search_cols, output_cols in data_files():
+        federated.add(name, DATA_DIR / filename, search_cols, output_cols)
+    for facet, (name, filename, _, _) in enumerate(data_files()):
+        bm25, queries = reference[name]
+        start = federated.starts[facet]
+        failures = []
+        for query in queries:
+            ranked = sorted(federated._ranked(query).get(facet, []))
+            for k in KS:
+                got = [(doc_id - start, -neg) for neg, doc_id in ranked[:k]]
+                want = expected_top_k(bm25, query, k)
+                if not same_ranking(got, want):
+                    failures.append(f"federated {name} ({query!r}, {k}) = {got}, score() head = {want}")
+        yield f"topk/federated/{filename}", len(queries) * len(KS), failures
+
+
+def _edits(docs, rng):
+    """(name, new documents) for the row changes update() has to follow"""
+    words = " ".join(docs).split() or ["word"]
+    n_changed = max(1, len(docs) // 10)
+
+    def edited(doc):
+        doc_words = doc.split()
+        if doc_words and rng.random() < 0.5:
+            doc_words.pop(rng.randrange(len(doc_words)))
+        else:
+            doc_words.insert(rng.randint(0, len(doc_words)), rng.choice(words))
+        return " ".join(doc_words)
+
+    edit = list(docs)
+    for i in rng.sample(range(len(docs)), min(n_changed, len(docs))):
+        edit[i] = edited(docs[i])
+    appended = docs + [edited(rng.choice(docs)) for _ in range(n_changed)] + ["fresh row with brandnewterm"]
+    removed = set(rng.sample(range(len(docs)), min(n_changed, len(docs))))
+    deleted = [doc for i, doc in enumerate(docs) if i not in removed]
+    duplicated = list(docs)
+    for doc in rng.sample(docs, min(n_changed, len(docs))):
+        duplicated.insert(rng.randint(0, len(duplicated)), doc)
+    reordered = rng.sample(docs, len(docs))
+    mixed = rng.sample(edit, len(edit))[n_changed:] + appended[len(docs):] + duplicated[:n_changed]
+    return [("unchanged", list(docs)), ("edit", edit), ("append", appended), ("delete", deleted),
+            ("duplicate", duplicated), ("reorder", reordered), ("mixed", mixed), ("empty", [])]
+
+
+def _rewrite_csv(path, rng, rename_column=None):
+    """Edit, append and delete rows of a CSV in place, optionally renaming one header column"""
+    import csv
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    header, body = rows[0], rows[1:]
+    if rename_column is not None:
+        header = [f"{name} (renamed)" if name == rename_column else name for name in header]
+    for i in rng.sample(range(len(body)), max(1, len(body) // 10)):
+        body[i] = [cell + " revised" if cell else cell for cell in body[i]]
+    del body[rng.randrange(len(body))]
+    body.append(list(body[0]))
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows([header] + body)
+
+
+def check_update(n_queries, rng):
+    """update() and load_index(previous=) against a fresh fit()"""
+    for name, filename, search_cols, output_cols in data_files():
+        docs = documents(filename, search_cols)
+        base = core.BM25()
+        base.fit(docs)
+        failures = []
+        cases = 0
+        for edit, new_docs in _edits(docs, rng):
+            fresh = core.BM25()
+            fresh.fit(new_docs)
+            for label, updated in [("update", base.update(docs, new_docs)),
+                                   ("update twice", base.update(docs, docs).update(docs, new_docs))]:
+                cases += 1
+                diff = state_diff(updated, fresh)
+                if diff:
+                    failures.append(f"{label} after {edit}: {', '.join(diff)} differ from fit()")
+        yield f"update/bm25/{filename}", cases, failures
+
+    saved = core.CACHE_DIR, core.INDEX_DIR
+    core.CACHE_DIR = core.INDEX_DIR = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, filename, search_cols, output_cols in data_files():
+                path = Path(tmp) / Path(filename).name
+                failures = []
+                other_cols = [col for col in output_cols if col not in search_cols]
+                renames = [None, other_cols[0] if other_cols else None, search_cols[0]]  # rows only, header, search column
+                for rename in renames:
+                    shutil.copyfile(DATA_DIR / filename, path)
+                    previous = core.load_index(path, search_cols, output_cols, "python")
+                    _rewrite_csv(path, rng, rename)
+                    updated = core.load_index(path, search_cols, output_cols, "python", previous=previous)
+                    fresh = core._build_index(path, search_cols, output_cols, "python")
+                    diff = state_diff(updated.bm25, fresh.bm25)
+                    if diff:
+                        failures.append(f"load_index(previous=) renaming {rename!r}: {', '.join(diff)} differ from a rebuild")
+                    for query in random_queries(fresh.bm25, max(1, n_queries // 10), rng):
+                        if updated.search(query, 10) != fresh.search(query, 10):
+                            failures.append(f"load_index(previous=) renaming {rename!r}: rows for {query!r} differ")
+                yield f"update/csv/{filename}", len(renames), failures
+    finally:
+        core.CACHE_DIR, core.INDEX_DIR = saved
+
+
+# ============ REPORTING ============
+def run(checks, n_queries, seed, out=sys.stdout):
+    """Run the selected checks; returns the number of failed ones"""
+    runners = {
+        "topk": check_topk,
+        "update": check_update,
+    }
+    rng = random.Random(seed)
+    failed = 0
+    for check in checks:
+        for name, cases, failures in runners[check](n_queries, rng):
+            status = "ok" if not failures else f"FAILED ({len(failures)})"
+            out.write(f"  {name:<48} {cases:>6} cases  {status}\n")
+            for failure in failures[:5]:
+                out.write(f"      {failure}\n")
+            failed += bool(failures)
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max Self-Checks")
+    parser.add_argument("--queries", "-q", type=int, default=60, help="Random queries per data file (default: 60)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--only", type=str, default=",".join(CHECKS), help=f"Comma-separated checks: {', '.join(CHECKS)}")
+    args = parser.parse_args()
+
+    checks = [c.strip() for c in args.only.split(",") if c.strip()]
+    unknown = [c for c in checks if c not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)}")
+
+    failed = run(checks, args.queries, args.seed)
+    print(f"{failed} check(s) failed" if failed else "All checks passed")
+    sys.exit(1 if failed else 0)
@@ -4,16 +4,68 @@
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
-import csv
+import heapq
+import os
+import functools
 import re
+import sys
+import threading
+import time
+from bisect import bisect_left
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+
+# csv, mmap, hashlib, pickle and tempfile are imported inside the column store and
+# index build/cache helpers: a --client call never needs them.
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
 MAX_RESULTS = 3
 
+# Bump TOKENIZER_VERSION whenever BM25.tokenize changes and INDEX_VERSION whenever
+# the pickled index layout changes, so stale cache files are rebuilt.
+TOKENIZER_VERSION = 1
+INDEX_VERSION = 9
+BINARY_VERSION = 1
+
+
+def _default_cache_dir():
+    """Resolve the on-disk index cache dir (UIPRO_CACHE_DIR="" disables caching)"""
+    override = os.environ.get("UIPRO_CACHE_DIR")
+    if override is not None:
+        return Path(override) if override else None
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "ui-ux-pro-max"
+
+
+CACHE_DIR = _default_cache_dir()
+
+# Memory-mapped binary indexes written by `search.py --build-index` (UIPRO_INDEX_DIR, or
+# <cache dir>/bin); load_index prefers them over the pickled cache when present
+INDEX_DIR = Path(os.environ["UIPRO_INDEX_DIR"]) if os.environ.get("UIPRO_INDEX_DIR") else (CACHE_DIR / "bin" if CACHE_DIR else None)
+
+# BM25 engine: "python" (pure Python, default) or "numpy" (NumPy/SciPy sparse matrices;
+# falls back to "python" when NumPy or SciPy is not installed)
+BM25_BACKEND = os.environ.get("UIPRO_BM25_BACKEND", "python")
+
+# Analyzed queries kept by the shared Analyzer's LRU cache
+QUERY_CACHE_SIZE = 4096
+
+# Fan-out of independent searches (design-system domains, page overrides): "thread"
+# (default), "process" or "serial"; UIPRO_WORKERS sizes the pool
+PARALLEL_MODE = os.environ.get("UIPRO_PARALLEL", "thread")
+PARALLEL_WORKERS = int(os.environ.get("UIPRO_WORKERS") or 0) or min(8, os.cpu_count() or 1)
+
+# Search result cache: entries kept (0 disables), optional TTL in seconds, and whether
+# results are persisted to <cache dir>/results.cache between CLI runs
+RESULT_CACHE_SIZE = int(os.environ.get("UIPRO_RESULT_CACHE_SIZE", 1024))
+RESULT_CACHE_TTL = float(os.environ.get("UIPRO_RESULT_CACHE_TTL") or 0) or None
+RESULT_CACHE_PERSIST = os.environ.get("UIPRO_RESULT_CACHE_PERSIST", "") not in ("", "0")
+
+# Memory cap for the in-process index registry (estimated bytes)
+REGISTRY_MAX_BYTES = int(os.environ.get("UIPRO_REGISTRY_MAX_BYTES", 256 * 1024 * 1024))
+
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
@@ -92,127 +144,1620 @@ _STACK_COLS = {
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+# ============ TIMINGS ============
+class _NullSpan:
+    """Shared do-nothing span returned while timings are disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times one `with` block into a Timings stage"""
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Timings:
+    """
+    Per-stage wall-clock totals for --timings.
+
+    Stages nest (e.g. index/fit includes index/tokenize). While disabled,
+    span() returns a shared no-op context manager, so instrumented code pays
+    one attribute check per span.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}  # name -> [calls, seconds], in first-seen order
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()  # spans may close on fan_out worker threads
+
+    def span(self, name):
+        """Context manager timing a stage"""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self, name, seconds):
+        """Add one call of a stage"""
+        with self._lock:
+            stage = self.stages.setdefault(name, [0, 0.0])
+            stage[0] += 1
+            stage[1] += seconds
+
+    def reset(self):
+        """Clear all stages and restart the wall clock"""
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    def as_dict(self):
+        """JSON-ready {stage: {"calls", "ms"}} plus "wall" since the last reset()"""
+        stages = {name: {"calls": calls, "ms": round(seconds * 1000, 3)} for name, (calls, seconds) in self.stages.items()}
+        stages["wall"] = {"calls": 1, "ms": round((time.perf_counter() - self.started) * 1000, 3)}
+        return stages
+
+    def format_table(self):
+        """Human-readable table of stages and wall time since the last reset()"""
+        lines = ["## Timings", "", f"{'stage':<28} {'calls':>6} {'total ms':>10}"]
+        for name, (calls, seconds) in self.stages.items():
+            lines.append(f"{name:<28} {calls:>6} {seconds * 1000:>10.2f}")
+        lines.append(f"{'wall':<28} {'':>6} {(time.perf_counter() - self.started) * 1000:>10.2f}")
+        return "\n".join(lines)
+
+
+TIMINGS = Timings()
+
+
+# ============ ANALYZER ============
+class Analyzer:
+    """
+    Tokenizer shared by documents and queries.
+
+    Document tokens are interned into a process-wide vocabulary of integer ids,
+    so every index keys its postings by the same ids and one analyzed query can
+    be scored against any domain. Query analysis is LRU-cached, so a query string
+    is tokenized once however many indexes it is run against; query tokens are
+    only looked up, never interned, so a long-running daemon's vocabulary stays
+    bounded by its data. A token no document has is kept as its string: it has
+    no postings in dict engines, mapped engines still resolve it by text, and it
+    is looked up again on each analyze() in case a later fit or update() has
+    interned it since.
+    """
+
+    _PUNCT = re.compile(r'[^\w\s]')
+
+    def __init__(self, cache_size=QUERY_CACHE_SIZE):
+        self.vocab = {}  # token -> id
+        self.tokens = []  # id -> token
+        self._lock = threading.Lock()
+        self._cached = functools.lru_cache(maxsize=cache_size)(self._analyze)
+
+    def tokenize(self, text):
+        """Lowercase, split, remove punctuation, filter short words"""
+        return [w for w in self._PUNCT.sub(' ', str(text).lower()).split() if len(w) > 2]
+
+    def term_id(self, token):
+        """Interned id of a token, assigned on first sight"""
+        term = self.vocab.get(token)
+        if term is None:
+            with self._lock:
+                term = self.vocab.get(token)
+                if term is None:
+                    term = len(self.tokens)
+                    self.tokens.append(token)
+                    self.vocab[token] = term
+        return term
+
+    def analyze_document(self, text):
+        """Token ids of a document, in order"""
+        vocab, term_id = self.vocab, self.term_id
+        return [vocab[w] if w in vocab else term_id(w) for w in self.tokenize(text)]
+
+    def query_tokens(self, query):
+        """Tokens of a query as a hashable tuple, from the cached analysis"""
+        return self._cached(query)[0]
+
+    def analyze(self, query):
+        """Token ids of a query as a hashable tuple; tokens not in the vocabulary stay strings"""
+        _, terms, unknown = self._cached(query)
+        if unknown:
+            vocab = self.vocab
+            terms = tuple(vocab.get(term, term) if isinstance(term, str) else term for term in terms)
+        return terms
+
+    def _analyze(self, query):
+        """Uncached analyze(): (tokens, terms, whether any token was unknown)"""
+        vocab = self.vocab
+        tokens = tuple(self.tokenize(query))
+        terms = tuple(vocab.get(w, w) for w in tokens)
+        return tokens, terms, any(isinstance(term, str) for term in terms)
+
+    def stats(self):
+        """Vocabulary size and query cache counters"""
+        info = self._cached.cache_info()
+        return {"vocab": len(self.tokens), "query_hits": info.hits, "query_misses": info.misses, "query_cached": info.currsize}
+
+
+ANALYZER = Analyzer()
+
+
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """
+    BM25 ranking algorithm for text search, backed by an inverted index.
+
+    Terms are ANALYZER ids. Queries may be passed as text or as an already
+    analyzed tuple of ids (see Analyzer.analyze).
+    """
+
+    # Attributes keyed by term id; pickled by token so cached indexes survive new processes
+    _TERM_KEYED = ("postings", "idf", "doc_freqs", "max_impact")
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
+        self.postings = {}  # term -> [(doc_id, tf), ...] in doc_id order
         self.doc_lengths = []
+        self.norms = []  # per-document length normalization: k1 * (1 - b + b * dl / avgdl)
         self.avgdl = 0
         self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.doc_freqs = {}
+        self.max_impact = {}  # term -> highest single-document score contribution
         self.N = 0
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        return ANALYZER.tokenize(text)
+
+    def _query_terms(self, query):
+        """Term ids of a query (cached by the analyzer) or a pre-analyzed tuple"""
+        return query if isinstance(query, tuple) else ANALYZER.analyze(query)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        tokens = ANALYZER.tokens
+        for attr in self._TERM_KEYED:
+            state[attr] = {tokens[term]: value for term, value in state[attr].items()}
+        return state
+
+    def __setstate__(self, state):
+        term_id = ANALYZER.term_id
+        for attr in self._TERM_KEYED:
+            state[attr] = {term_id(token): value for token, value in state[attr].items()}
+        self.__dict__.update(state)
+
+    # Engines that can update() instead of refitting; SparseBM25 and the mapped engines rebuild
+    supports_update = True
 
     def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        """Build postings lists, document lengths and IDF from documents"""
+        with TIMINGS.span("index/tokenize"):
+            corpus = [ANALYZER.analyze_document(doc) for doc in documents]
+
+        postings = defaultdict(list)
+        for doc_id, doc in enumerate(corpus):
+            term_freqs = {}
+            for word in doc:
+                term_freqs[word] = term_freqs.get(word, 0) + 1
+            for word, tf in term_freqs.items():
+                postings[word].append((doc_id, tf))
+        self._finish(postings, [len(doc) for doc in corpus])
+
+    def update(self, old_documents, documents):
+        """
+        Return a new engine fitted to documents, reusing this one's postings for
+        rows of old_documents whose text is unchanged.
+
+        Rows are matched by hashing their text, so appended, edited, removed and
+        reordered rows are all handled; only new or edited rows are tokenized.
+        Surviving postings are renumbered to the new doc ids, then document
+        frequencies, IDF, avgdl, norms and max impacts are recomputed from the
+        postings, giving exactly the index fit(documents) would.
+        """
+        unmatched = defaultdict(list)  # text -> old doc ids, last popped first
+        for doc_id in range(len(old_documents) - 1, -1, -1):
+            unmatched[old_documents[doc_id]].append(doc_id)
+        remap = {}  # old doc id -> new doc id
+        added = []
+        for doc_id, doc in enumerate(documents):
+            old_ids = unmatched.get(doc)
+            if old_ids:
+                remap[old_ids.pop()] = doc_id
+            else:
+                added.append(doc_id)
+
+        postings = defaultdict(list)
+        if len(remap) == self.N and all(old_id == doc_id for old_id, doc_id in remap.items()):
+            for word, plist in self.postings.items():  # rows only appended: postings carry over as they are
+                postings[word] = list(plist)
+        else:
+            for word, plist in self.postings.items():
+                kept = [(remap[doc_id], tf) for doc_id, tf in plist if doc_id in remap]
+                if kept:
+                    postings[word] = kept
+        doc_lengths = [0] * len(documents)
+        for old_id, doc_id in remap.items():
+            doc_lengths[doc_id] = self.doc_lengths[old_id]
+
+        with TIMINGS.span("index/tokenize"):
+            for doc_id in added:
+                doc = ANALYZER.analyze_document(documents[doc_id])
+                doc_lengths[doc_id] = len(doc)
+                term_freqs = {}
+                for word in doc:
+                    term_freqs[word] = term_freqs.get(word, 0) + 1
+                for word, tf in term_freqs.items():
+                    postings[word].append((doc_id, tf))
+        for plist in postings.values():
+            plist.sort()  # near-sorted after renumbering and appends: linear for timsort
+
+        engine = type(self)(self.k1, self.b)
+        engine._finish(postings, doc_lengths)
+        return engine
+
+    def _finish(self, postings, doc_lengths):
+        """Set postings and document lengths, then derive norms, document frequencies, IDF and max impacts"""
+        self.N = len(doc_lengths)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
+        self.doc_lengths = doc_lengths
         self.avgdl = sum(self.doc_lengths) / self.N
+        self.norms = [self.k1 * (1 - self.b + self.b * dl / self.avgdl) for dl in self.doc_lengths]
+        self.postings = dict(postings)
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
-
+        self.doc_freqs = {word: len(plist) for word, plist in self.postings.items()}
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
+        k1_plus_1 = self.k1 + 1
+        norms = self.norms
+        for word, plist in self.postings.items():
+            idf = self.idf[word]
+            self.max_impact[word] = max(idf * (tf * k1_plus_1) / (tf + norms[doc_id]) for doc_id, tf in plist)
+
+    def nbytes(self):
+        """Approximate memory footprint: postings tuples, per-term dict entries, per-doc arrays"""
+        n_postings = sum(len(plist) for plist in self.postings.values())
+        return n_postings * 64 + len(self.postings) * 256 + self.N * 64
+
+    def _impact(self, token, doc_id, tf):
+        """Score contribution of one query token occurrence to one document"""
+        return self.idf[token] * (tf * (self.k1 + 1)) / (tf + self.norms[doc_id])
+
     def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        """Score all documents against query, touching only postings of query terms"""
+        scores = [0] * self.N
+        k1_plus_1 = self.k1 + 1
+        norms = self.norms
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+        for token in self._query_terms(query):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            idf = self.idf[token]
+            for doc_id, tf in postings:
+                scores[doc_id] += idf * (tf * k1_plus_1) / (tf + norms[doc_id])
+
+        return sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
+
+    def top_k(self, query, k):
+        """
+        Return the k best (doc_id, score) pairs with score > 0, best first.
+
+        Equivalent to the positive-score head of score(), but keeps only k candidates
+        in a heap and uses MaxScore pruning: query terms are ordered by their score
+        upper bound, and once the k-th best score exceeds the summed bounds of the
+        weakest terms, those terms stop generating candidates and are only probed
+        for documents that could still make the cut.
+        """
+        if k <= 0:
+            return []
+        query_tokens = self._query_terms(query)
+        weights = {}
+        for token in query_tokens:
+            if token in self.postings:
+                weights[token] = weights.get(token, 0) + 1
+        if not weights:
+            return []
+
+        terms = sorted(weights, key=lambda t: weights[t] * self.max_impact[t])
+        plists = [self.postings[t] for t in terms]
+        bounds = [weights[t] * self.max_impact[t] for t in terms]
+        prefix = []  # prefix[i] = summed bounds of terms[0..i]
+        total = 0.0
+        for bound in bounds:
+            total += bound
+            prefix.append(total)
+
+        eps = 1e-9  # slack so float rounding in the bounds never prunes a true hit
+        cursors = [0] * len(terms)
+        heap = []  # (score, -doc_id): root is the current k-th best
+        threshold = None
+        first_essential = 0
 
+        while True:
+            # Next candidate: smallest doc_id among the essential terms' cursors
+            doc_id = None
+            for i in range(first_essential, len(terms)):
+                if cursors[i] < len(plists[i]):
+                    candidate = plists[i][cursors[i]][0]
+                    if doc_id is None or candidate < doc_id:
+                        doc_id = candidate
+            if doc_id is None:
+                break
+
+            term_freqs = {}
+            partial = 0.0
+            for i in range(first_essential, len(terms)):
+                pos = cursors[i]
+                if pos < len(plists[i]) and plists[i][pos][0] == doc_id:
+                    tf = plists[i][pos][1]
+                    term_freqs[terms[i]] = tf
+                    partial += weights[terms[i]] * self._impact(terms[i], doc_id, tf)
+                    cursors[i] = pos + 1
+
+            # Probe non-essential terms, strongest first, while the doc can still qualify
+            pruned = False
+            for i in range(first_essential - 1, -1, -1):
+                if partial + prefix[i] + eps < threshold:
+                    pruned = True
+                    break
+                pos = bisect_left(plists[i], (doc_id,), cursors[i])
+                cursors[i] = pos
+                if pos < len(plists[i]) and plists[i][pos][0] == doc_id:
+                    tf = plists[i][pos][1]
+                    term_freqs[terms[i]] = tf
+                    partial += weights[terms[i]] * self._impact(terms[i], doc_id, tf)
+            if pruned:
+                continue
+
+            # Exact score, summed in query order exactly as score() does
+            doc_score = 0
             for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+                tf = term_freqs.get(token)
+                if tf:
+                    doc_score += self._impact(token, doc_id, tf)
 
-            scores.append((idx, score))
+            entry = (doc_score, -doc_id)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            else:
+                continue
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+            if len(heap) == k:
+                threshold = heap[0][0]
+                while first_essential < len(terms) and prefix[first_essential] + eps < threshold:
+                    first_essential += 1
 
+        return [(-neg_id, doc_score) for doc_score, neg_id in sorted(heap, reverse=True)]
 
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+    def top_k_batch(self, queries, k):
+        """top_k() for each query, in input order"""
+        return [self.top_k(query, k) for query in queries]
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+def _import_sparse():
+    """Return (numpy, scipy.sparse), or None when either is not installed"""
+    try:
+        import numpy
+        import scipy.sparse
+    except ImportError:
+        return None
+    return numpy, scipy.sparse
+
+
+class SparseBM25(BM25):
+    """
+    Vectorized BM25 backend (requires NumPy and SciPy).
+
+    Term weights idf * tf * (k1 + 1) / (tf + norm) are precomputed into a CSR
+    docs x terms matrix, so a query is one sparse matrix-vector product and a
+    batch of queries one sparse matrix-matrix product, followed by argpartition
+    for the top k. Scores match BM25 within floating-point tolerance.
+    """
+
+    BATCH_CHUNK = 256  # queries scored per dense block in top_k_batch
+    _TERM_KEYED = BM25._TERM_KEYED + ("vocab",)
+    supports_update = False
+
+    def __init__(self, k1=1.5, b=0.75):
+        super().__init__(k1, b)
+        self.vocab = {}  # term id -> column
+        self.idf_vector = None
+        self.norm_vector = None
+        self.matrix = None
+
+    def fit(self, documents):
+        """Build the CSR weight matrix, IDF and length-normalization vectors"""
+        np, sparse = _import_sparse()
+        with TIMINGS.span("index/tokenize"):
+            corpus = [ANALYZER.analyze_document(doc) for doc in documents]
+        self.N = len(corpus)
+        self.vocab = {}
+        rows, cols, tfs = [], [], []
+        for doc_id, doc in enumerate(corpus):
+            term_freqs = {}
+            for word in doc:
+                term_freqs[word] = term_freqs.get(word, 0) + 1
+            for word, tf in term_freqs.items():
+                rows.append(doc_id)
+                cols.append(self.vocab.setdefault(word, len(self.vocab)))
+                tfs.append(tf)
+
+        shape = (self.N, len(self.vocab))
+        tf_matrix = sparse.csr_matrix((np.array(tfs, dtype=np.float64), (rows, cols)), shape=shape)
+        if self.N == 0:
+            self.matrix = tf_matrix
+            return
+
+        self.doc_lengths = np.array([len(doc) for doc in corpus], dtype=np.float64)
+        self.avgdl = float(self.doc_lengths.mean())
+        self.norm_vector = self.k1 * (1 - self.b + self.b * self.doc_lengths / self.avgdl)
+        doc_freqs = np.bincount(tf_matrix.indices, minlength=len(self.vocab))
+        self.idf_vector = np.log((self.N - doc_freqs + 0.5) / (doc_freqs + 0.5) + 1)
+
+        # Per-nonzero row ids let the BM25 weight be computed in one vectorized pass
+        row_ids = np.repeat(np.arange(self.N), np.diff(tf_matrix.indptr))
+        tf = tf_matrix.data
+        weights = self.idf_vector[tf_matrix.indices] * (tf * (self.k1 + 1)) / (tf + self.norm_vector[row_ids])
+        self.matrix = sparse.csr_matrix((weights, tf_matrix.indices, tf_matrix.indptr), shape=shape)
+
+        self.doc_freqs = {word: int(doc_freqs[col]) for word, col in self.vocab.items()}
+        self.idf = {word: float(self.idf_vector[col]) for word, col in self.vocab.items()}
+
+    def nbytes(self):
+        """Approximate memory footprint: matrix buffers, vectors and the vocabulary dicts"""
+        arrays = [self.matrix.data, self.matrix.indices, self.matrix.indptr, self.idf_vector, self.norm_vector, self.doc_lengths]
+        return sum(a.nbytes for a in arrays if a is not None and hasattr(a, "nbytes")) + len(self.vocab) * 256
+
+    def _query_matrix(self, queries):
+        """CSR queries x terms matrix of query term counts"""
+        np, sparse = _import_sparse()
+        rows, cols = [], []
+        for row, query in enumerate(queries):
+            for token in self._query_terms(query):
+                col = self.vocab.get(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        data = np.ones(len(rows), dtype=np.float64)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(len(queries), len(self.vocab)))
+
+    def _scores(self, query):
+        """Dense score vector for one query"""
+        query_vector = self._query_matrix([query]).toarray().ravel()
+        return self.matrix @ query_vector
+
+    def _select(self, scores, k):
+        """Top-k positive (doc_id, score) pairs, ties broken by doc_id like BM25"""
+        np, _ = _import_sparse()
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > k:
+            part = scores[candidates]
+            kth = part[np.argpartition(-part, k - 1)[:k]].min()
+            candidates = candidates[part >= kth]  # keep boundary ties for stable ordering
+        order = np.lexsort((candidates, -scores[candidates]))[:k]
+        return [(int(candidates[i]), float(scores[candidates[i]])) for i in order]
+
+    def score(self, query):
+        """Score all documents against query"""
+        if self.N == 0:
+            return []
+        scores = self._scores(query)
+        order = _import_sparse()[0].argsort(-scores, kind="stable")
+        return [(int(i), float(scores[i])) for i in order]
+
+    def top_k(self, query, k):
+        """Return the k best (doc_id, score) pairs with score > 0, best first"""
+        if k <= 0 or self.N == 0:
+            return []
+        return self._select(self._scores(query), k)
+
+    def top_k_batch(self, queries, k):
+        """Score many queries with one sparse product per chunk, in input order"""
+        queries = list(queries)
+        if k <= 0 or self.N == 0:
+            return [[] for _ in queries]
+        results = []
+        for start in range(0, len(queries), self.BATCH_CHUNK):
+            chunk = queries[start:start + self.BATCH_CHUNK]
+            scores = (self.matrix @ self._query_matrix(chunk).T).toarray()
+            results.extend(self._select(scores[:, col], k) for col in range(len(chunk)))
+        return results
+
+
+def resolve_backend(backend=None):
+    """Effective backend name: BM25_BACKEND by default, "python" if NumPy/SciPy are missing"""
+    backend = backend or BM25_BACKEND
+    if backend not in ("python", "numpy"):
+        raise ValueError(f"Unknown BM25 backend: {backend}. Available: python, numpy")
+    if backend == "numpy" and _import_sparse() is None:
+        return "python"
+    return backend
+
+
+def create_bm25(backend=None, k1=1.5, b=0.75):
+    """Create a BM25 engine for backend ("python" or "numpy")"""
+    if resolve_backend(backend) == "numpy":
+        return SparseBM25(k1, b)
+    return BM25(k1, b)
+
+
+# ============ COLUMN STORE ============
+class StaleIndexError(RuntimeError):
+    """The CSV behind an index changed since the index was built"""
+
+
+class _Column:
+    """One CSV column as a single string buffer plus row offsets (None marks a missing cell)"""
+
+    __slots__ = ("text", "offsets", "nulls")
+
+    def __init__(self, values):
+        from array import array
+        parts, nulls = [], []
+        offsets = array('L', [0])
+        end = 0
+        for i, value in enumerate(values):
+            if value is None:
+                nulls.append(i)
+                value = ""
+            parts.append(value)
+            end += len(value)
+            offsets.append(end)
+        self.text = "".join(parts)
+        self.offsets = offsets
+        self.nulls = frozenset(nulls)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i in self.nulls:
+            return None
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def values(self):
+        """All cells as a list"""
+        text, offsets = self.text, self.offsets
+        values = [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        for i in self.nulls:
+            values[i] = None
+        return values
+
+    def nbytes(self):
+        return sys.getsizeof(self.text) + self.offsets.itemsize * len(self.offsets) + 64 * len(self.nulls)
+
+
+class ColumnStore:
+    """
+    Column-oriented rows of one CSV file.
+
+    Header names are interned once and the columns passed at build time (the
+    search columns) are kept as _Columns. Result rows are not kept at all: the
+    byte offset of every record is recorded, and a row is read from the CSV
+    and parsed only when it is returned. Reads are positioned reads (os.pread)
+    on a descriptor opened per process rather than a memory map, so a CSV
+    truncated in place raises StaleIndexError instead of faulting (SIGBUS) on
+    the unmapped tail, and threads read concurrently without a shared offset.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, filepath, header, columns, offsets):
+        self.filepath = str(filepath)
+        self.header = header
+        self.positions = {name: i for i, name in enumerate(header)}  # last wins, as in csv.DictReader
+        self.columns = columns
+        self.offsets = offsets  # start of record i; offsets[-1] is the file size
+        self._fd = None
+        self._pid = None  # process that opened _fd: a forked child opens its own
+
+    @classmethod
+    def from_csv(cls, filepath, names):
+        """Parse a CSV once, keeping only the given columns plus record offsets"""
+        header, columns, offsets = _read_columns(filepath, names)
+        return cls(filepath, header, columns, offsets)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_fd"] = state["_pid"] = None
+        return state
+
+    def __del__(self):
+        if getattr(self, "_fd", None) is not None and self._pid == os.getpid():
+            os.close(self._fd)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def documents(self, names):
+        """One space-joined document per row over the given columns"""
+        if not names:
+            return [""] * len(self)
+        columns = []
+        for name in names:
+            col = self.columns.get(name)
+            if col is None:
+                columns.append([""] * len(self))
+            else:
+                columns.append([str(value) for value in col.values()] if col.nulls else col.values())
+        return [" ".join(parts) for parts in zip(*columns)]
+
+    def _open(self):
+        """Descriptor of the CSV for this process, opened on first use"""
+        with self._lock:
+            if self._fd is None or self._pid != os.getpid():
+                self._fd = os.open(self.filepath, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+                self._pid = os.getpid()
+            return self._fd
+
+    def _read(self, start, end):
+        """Bytes start:end of the CSV; StaleIndexError if its size changed"""
+        fd = self._fd if self._pid == os.getpid() else None
+        if fd is None:
+            fd = self._open()
+        if os.fstat(fd).st_size != self.offsets[-1]:
+            raise StaleIndexError(f"{self.filepath} changed since it was indexed")
+        if hasattr(os, "pread"):
+            data = os.pread(fd, end - start, start)
+        else:  # Windows: no pread, so seek and read under the lock
+            with self._lock:
+                os.lseek(fd, start, os.SEEK_SET)
+                data = os.read(fd, end - start)
+        if len(data) != end - start:  # truncated between the size check and the read
+            raise StaleIndexError(f"{self.filepath} changed since it was indexed")
+        return data
+
+    def _record(self, i):
+        """Parse record i from the CSV, checking it against the kept columns"""
+        import csv
+        raw = self._read(self.offsets[i], self.offsets[i + 1])
+        record = next((row for row in csv.reader(_text_lines(raw.splitlines(keepends=True))) if row), [])
+        for name, col in self.columns.items():
+            pos = self.positions[name]
+            if (record[pos] if pos < len(record) else None) != col[i]:
+                raise StaleIndexError(f"{self.filepath} changed since it was indexed")
+        return record
+
+    def row(self, i, names):
+        """Row i as a dict of the given columns present in the header"""
+        record = self._record(i)
+        width = len(record)
+        return {name: record[pos] if pos < width else None
+                for name, pos in ((name, self.positions.get(name)) for name in names) if pos is not None}
+
+    def nbytes(self):
+        """Approximate memory footprint of the kept columns and offsets"""
+        return (sum(col.nbytes() for col in self.columns.values()) + 128 * len(self.header)
+                + self.offsets.itemsize * len(self.offsets))
+
+
+def _text_lines(raw_lines):
+    """Decode UTF-8 CSV byte lines with universal newlines, as open() in text mode does"""
+    for raw in raw_lines:
+        line = raw.decode('utf-8')
+        if line.endswith("\r\n"):
+            line = line[:-2] + "\n"
+        elif line.endswith("\r"):
+            line = line[:-1] + "\n"
+        yield line
+
+
+def _read_columns(filepath, names):
+    """
+    Parse a CSV into (header, {name: _Column}, record offsets) for the named columns.
+
+    Mirrors csv.DictReader: blank lines are skipped, short rows read as None and a
+    repeated header name takes the value of its last column. Offsets are byte
+    positions, so multi-line quoted fields are accounted for.
+    """
+    import csv
+    from array import array
+    with open(filepath, 'rb') as f:
+        data = f.read()
+
+    consumed = [0]
+
+    def lines():
+        for raw in data.splitlines(keepends=True):
+            consumed[0] += len(raw)
+            yield raw
+
+    reader = csv.reader(_text_lines(lines()))
+    header = tuple(sys.intern(name) for name in next(reader, ()))
+    positions = {name: i for i, name in enumerate(header)}
+    wanted = [(name, positions[name]) for name in dict.fromkeys(names) if name in positions]
+    values = {name: [] for name, _ in wanted}
+    offsets = array('Q')
+    start = consumed[0]
+    for row in reader:
+        if row:
+            offsets.append(start)
+            width = len(row)
+            for name, pos in wanted:
+                values[name].append(row[pos] if pos < width else None)
+        start = consumed[0]
+    offsets.append(len(data))
+    return header, {sys.intern(name): _Column(col) for name, col in values.items()}, offsets
+
+
+# ============ INDEX CACHE ============
+class CsvIndex:
+    """Fitted BM25 index plus the column store of one CSV file"""
+
+    def __init__(self, bm25, store, output_cols):
+        self.bm25 = bm25
+        self.store = store
+        self.output_cols = output_cols
+        self.signature = None  # (size, mtime_ns) of the CSV when indexed, set by load_index
+
+    def is_current(self):
+        """Whether the CSV still has the size and mtime it was indexed at (a missing file counts as current)"""
+        try:
+            stat = os.stat(self.store.filepath)
+        except OSError:
+            return True
+        return self.signature == (stat.st_size, stat.st_mtime_ns)
+
+    def nbytes(self):
+        """Approximate memory footprint of the BM25 engine plus the loaded columns"""
+        return self.bm25.nbytes() + self.store.nbytes()
+
+    def search(self, query, max_results):
+        """Return output rows of the top results with score > 0"""
+        with TIMINGS.span("search/score"):
+            ranked = self.bm25.top_k(query, max_results)
+        return [self.store.row(idx, self.output_cols) for idx, _ in ranked]
+
+    def search_many(self, queries, max_results):
+        """search() for each query, scored together by the backend's top_k_batch"""
+        with TIMINGS.span("search/score"):
+            ranked = self.bm25.top_k_batch(queries, max_results)
+        return [[self.store.row(idx, self.output_cols) for idx, _ in hits] for hits in ranked]
+
+
+def _build_index(filepath, search_cols, output_cols, backend=None):
+    """Parse the search columns of a CSV and fit a BM25 index over them (result rows are read on demand)"""
+    with TIMINGS.span("index/csv_load"):
+        store = ColumnStore.from_csv(filepath, search_cols)
+
+    bm25 = create_bm25(backend)
+    with TIMINGS.span("index/fit"):
+        bm25.fit(store.documents(search_cols))
+    return CsvIndex(bm25, store, list(output_cols))
+
+
+def _update_index(index, filepath, search_cols, output_cols):
+    """
+    Refit index to the CSV's current rows incrementally (see BM25.update).
+
+    Returns None when a full rebuild is needed: no previous index, an engine
+    without update(), or a changed header (column layout).
+    """
+    if index is None or not index.bm25.supports_update or not isinstance(index.store, ColumnStore):
+        return None
+    with TIMINGS.span("index/csv_load"):
+        store = ColumnStore.from_csv(filepath, search_cols)
+    if store.header != index.store.header or set(index.store.columns) != set(store.columns):
+        return None
+    with TIMINGS.span("index/update"):
+        bm25 = index.bm25.update(index.store.documents(search_cols), store.documents(search_cols))
+    return CsvIndex(bm25, store, list(output_cols))
+
+
+def _cache_key(filepath, search_cols, output_cols, backend):
+    """Identity of a cached index: CSV path + column layout + backend + tokenizer/index version"""
+    return "|".join([
+        str(Path(filepath).resolve()),
+        ",".join(search_cols),
+        ",".join(output_cols),
+        backend,
+        f"tok{TOKENIZER_VERSION}",
+        f"idx{INDEX_VERSION}",
+    ])
+
+
+def _cache_path(filepath, key):
+    """Cache file for a key; crc32 keeps hashlib off the warm path, and entries store the full key"""
+    import zlib
+    return CACHE_DIR / f"{Path(filepath).stem}-{zlib.crc32(key.encode('utf-8')):08x}.idx"
+
+
+def _file_digest(filepath):
+    """SHA-1 of a file's content"""
+    import hashlib
+    with open(filepath, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _write_cache(cache_file, entry):
+    """Atomically write a cache entry; caching is best-effort, so errors are ignored"""
+    import pickle
+    import tempfile
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f, TIMINGS.span("index/cache_write"):
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass
+
+
+def _read_cache(cache_file, key):
+    """Read the cache entry for key, returning None when missing, unreadable or foreign"""
+    import pickle
+    try:
+        with open(cache_file, 'rb') as f:
+            entry = pickle.load(f)
+    except Exception:
+        return None
+    return entry if isinstance(entry, dict) and entry.get("key") == key else None
+
+
+def load_index(filepath, search_cols, output_cols, backend=None, previous=None):
+    """
+    Return the CsvIndex for a CSV, using the on-disk cache when it is fresh.
+
+    A binary index built with --build-index is opened in preference. An entry
+    is fresh when the CSV size and mtime match; if only the mtime moved (e.g.
+    after a git checkout) the content hash decides and the entry is re-stamped.
+    When the CSV did change, previous (the caller's outdated index) or the stale
+    cache entry is updated incrementally instead of rebuilt where possible.
+    """
+    filepath = Path(filepath)
+    backend = resolve_backend(backend)
+    if INDEX_DIR is not None:
+        index = open_binary_index(filepath, search_cols, output_cols, backend)
+        if index is not None:
+            return index
+
+    stat = filepath.stat()
+    if CACHE_DIR is None:
+        index = _update_index(previous, filepath, search_cols, output_cols) or _build_index(filepath, search_cols, output_cols, backend)
+        index.signature = (stat.st_size, stat.st_mtime_ns)
+        return index
+
+    key = _cache_key(filepath, search_cols, output_cols, backend)
+    cache_file = _cache_path(filepath, key)
+    with TIMINGS.span("index/cache_read"):
+        entry = _read_cache(cache_file, key)
 
-    data = _load_csv(filepath)
+    if entry and entry["size"] == stat.st_size:
+        if entry["mtime_ns"] == stat.st_mtime_ns:
+            entry["index"].signature = (stat.st_size, stat.st_mtime_ns)
+            return entry["index"]
+        if entry["sha1"] == _file_digest(filepath):
+            entry["mtime_ns"] = stat.st_mtime_ns
+            _write_cache(cache_file, entry)
+            entry["index"].signature = (stat.st_size, stat.st_mtime_ns)
+            return entry["index"]
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    base = previous if previous is not None else (entry["index"] if entry else None)
+    index = _update_index(base, filepath, search_cols, output_cols) or _build_index(filepath, search_cols, output_cols, backend)
+    index.signature = (stat.st_size, stat.st_mtime_ns)
+    _write_cache(cache_file, {
+        "key": key,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha1": _file_digest(filepath),
+        "index": index,
+    })
+    return index
 
-    # BM25 search
+
+# ============ BINARY INDEX ============
+BINARY_MAGIC = b"UIPXBM25"
+
+# (section, array typecode); int32 postings let the numpy backend wrap them without a copy
+_BINARY_SECTIONS = [
+    ("norms", "d"),         # [N] BM25 length normalization per document
+    ("doc_lengths", "I"),   # [N] tokens per document
+    ("row_offsets", "Q"),   # [N + 1] byte offset of every CSV record, then the file size
+    ("term_offsets", "Q"),  # [V + 1] absolute file offsets of the UTF-8 terms, sorted by bytes
+    ("idf", "d"),           # [V]
+    ("max_impact", "d"),    # [V] highest single-document contribution of each term
+    ("post_offsets", "i"),  # [V + 1] start of each term's postings
+    ("post_docs", "i"),     # [P] doc ids, ascending within a term
+    ("post_tfs", "I"),      # [P] term frequencies
+    ("impacts", "d"),       # [P] precomputed idf * tf * (k1 + 1) / (tf + norm)
+]
+
+
+def _binary_key(filepath, search_cols):
+    """Identity of a binary index: CSV path + search columns + tokenizer/format version"""
+    return "|".join([
+        str(Path(filepath).resolve()),
+        ",".join(search_cols),
+        f"tok{TOKENIZER_VERSION}",
+        f"bin{BINARY_VERSION}",
+    ])
+
+
+def _binary_path(filepath, search_cols, index_dir=None):
+    """Binary index file of a CSV and column layout"""
+    import zlib
+    key = _binary_key(filepath, search_cols)
+    return Path(index_dir or INDEX_DIR) / f"{Path(filepath).stem}-{zlib.crc32(key.encode('utf-8')):08x}.bm25"
+
+
+def write_binary_index(filepath, search_cols, index_dir=None):
+    """
+    Fit a CSV and write its memory-mappable index; returns a summary dict.
+
+    Layout: magic, u64 header length, JSON header (key, CSV size/mtime, counts,
+    section offsets), then the _BINARY_SECTIONS arrays, each 8-byte aligned.
+    """
+    import json
+    import struct
+    import tempfile
+    from array import array
+
+    filepath = Path(filepath)
+    stat = filepath.stat()
+    with TIMINGS.span("index/csv_load"):
+        store = ColumnStore.from_csv(filepath, search_cols)
     bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    with TIMINGS.span("index/fit"):
+        bm25.fit(store.documents(search_cols))
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    tokens = ANALYZER.tokens
+    terms = sorted(bm25.postings, key=lambda term: tokens[term].encode('utf-8'))
+    encoded = [tokens[term].encode('utf-8') for term in terms]
+    k1_plus_1 = bm25.k1 + 1
+    arrays = {
+        "norms": array('d', bm25.norms),
+        "doc_lengths": array('I', bm25.doc_lengths),
+        "row_offsets": array('Q', store.offsets),
+        "term_offsets": array('Q'),
+        "idf": array('d', (bm25.idf[term] for term in terms)),
+        "max_impact": array('d', (bm25.max_impact[term] for term in terms)),
+        "post_offsets": array('i', [0]),
+        "post_docs": array('i'),
+        "post_tfs": array('I'),
+        "impacts": array('d'),
+    }
+    for term in terms:
+        idf = bm25.idf[term]
+        for doc_id, tf in bm25.postings[term]:
+            arrays["post_docs"].append(doc_id)
+            arrays["post_tfs"].append(tf)
+            arrays["impacts"].append(idf * (tf * k1_plus_1) / (tf + bm25.norms[doc_id]))
+        arrays["post_offsets"].append(len(arrays["post_docs"]))
+
+    def layout(blob_start):
+        """Section offsets and file size given where the term blob starts"""
+        sections, pos = {}, blob_start + sum(len(term) for term in encoded)
+        for name, code in _BINARY_SECTIONS:
+            pos = (pos + 7) & ~7
+            count = len(arrays[name]) if name != "term_offsets" else len(terms) + 1
+            sections[name] = [pos, count, code]
+            pos += count * array(code).itemsize
+        return sections, pos
+
+    meta = {
+        "key": _binary_key(filepath, search_cols),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "byteorder": sys.byteorder,
+        "k1": bm25.k1,
+        "b": bm25.b,
+        "N": bm25.N,
+        "avgdl": bm25.avgdl,
+        "terms": len(terms),
+        "postings": len(arrays["post_docs"]),
+        "header": list(store.header),
+    }
+    # The header holds the section offsets, which depend on the header length: iterate to a fixed point
+    header_len = 0
+    while True:
+        blob_start = len(BINARY_MAGIC) + 8 + header_len
+        meta["sections"], total = layout(blob_start)
+        header = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        if len(header) == header_len:
+            break
+        header_len = len(header)
+    pos = blob_start
+    for term in encoded:
+        arrays["term_offsets"].append(pos)
+        pos += len(term)
+    arrays["term_offsets"].append(pos)
+
+    path = _binary_path(filepath, search_cols, index_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f, TIMINGS.span("index/binary_write"):
+            f.write(BINARY_MAGIC + struct.pack("<Q", len(header)) + header)
+            f.write(b"".join(encoded))
+            for name, _ in _BINARY_SECTIONS:
+                f.write(b"\0" * (meta["sections"][name][0] - f.tell()))
+                arrays[name].tofile(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return {"file": filepath.name, "path": str(path), "docs": bm25.N, "terms": len(terms), "bytes": total}
+
+
+def _map_binary_index(path, key, stat):
+    """(meta, mmap, section views) of a binary index, or None when missing, foreign or stale"""
+    import json
+    import mmap
+    import struct
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if mapped[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            return None
+        (header_len,) = struct.unpack_from("<Q", mapped, len(BINARY_MAGIC))
+        start = len(BINARY_MAGIC) + 8
+        meta = json.loads(mapped[start:start + header_len].decode('utf-8'))
+    except (struct.error, ValueError):
+        return None
+    if (meta.get("key") != key or meta.get("byteorder") != sys.byteorder
+            or meta.get("size") != stat.st_size or meta.get("mtime_ns") != stat.st_mtime_ns):
+        return None
+    view = memoryview(mapped)
+    sections = {name: view[offset:offset + count * _itemsize(code)].cast(code)
+                for name, (offset, count, code) in meta["sections"].items()}
+    return meta, mapped, sections
+
+
+def _itemsize(code):
+    from array import array
+    return array(code).itemsize
+
+
+def open_binary_index(filepath, search_cols, output_cols, backend=None):
+    """
+    Open the binary index of a CSV as a CsvIndex, or return None when none was built.
+
+    A binary index that no longer matches its CSV is rewritten first, so it only
+    has to be built once with `search.py --build-index`.
+    """
+    filepath = Path(filepath)
+    path = _binary_path(filepath, search_cols)
+    if not path.exists():
+        return None
+    stat = filepath.stat()
+    key = _binary_key(filepath, search_cols)
+    with TIMINGS.span("index/binary_open"):
+        mapped = _map_binary_index(path, key, stat)
+    if mapped is None:
+        try:
+            write_binary_index(filepath, search_cols, path.parent)
+        except OSError:
+            return None
+        with TIMINGS.span("index/binary_open"):
+            mapped = _map_binary_index(path, key, filepath.stat())
+        if mapped is None:
+            return None
+
+    meta, buffer, sections = mapped
+    engine = MappedSparseBM25 if resolve_backend(backend) == "numpy" else MappedBM25
+    store = ColumnStore(filepath, tuple(sys.intern(name) for name in meta["header"]), {}, sections["row_offsets"])
+    index = CsvIndex(engine(meta, buffer, sections), store, list(output_cols))
+    index.signature = (meta["size"], meta["mtime_ns"])
+    return index
+
+
+def build_binary_indexes(index_dir=None):
+    """Write binary indexes for every domain and stack CSV in DATA_DIR; returns their summaries"""
+    configs = [(config["file"], config["search_cols"]) for config in CSV_CONFIG.values()]
+    configs += [(config["file"], _STACK_COLS["search_cols"]) for config in STACK_CONFIG.values()]
+    summaries = []
+    for filename, search_cols in configs:
+        filepath = DATA_DIR / filename
+        if filepath.exists():
+            summaries.append(write_binary_index(filepath, search_cols, index_dir))
+    return summaries
+
+
+class _TermView:
+    """Read-only term id -> value mapping over one per-term array of a mapped engine"""
+
+    __slots__ = ("engine", "value")
+
+    def __init__(self, engine, value):
+        self.engine = engine
+        self.value = value  # row of the term table -> value
+
+    def __len__(self):
+        return self.engine.n_terms
+
+    def __contains__(self, term):
+        return self.engine._row(term) >= 0
+
+    def __getitem__(self, term):
+        row = self.engine._row(term)
+        if row < 0:
+            raise KeyError(term)
+        return self.value(row)
+
+    def get(self, term, default=None):
+        row = self.engine._row(term)
+        return self.value(row) if row >= 0 else default
+
+
+class _MappedTerms:
+    """
+    Vocabulary of a mapped binary index: ANALYZER term ids are resolved by binary
+    search over the sorted term table, and memoized per engine.
+    """
+
+    supports_update = False
+
+    def _attach(self, meta, buffer, sections):
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.N = meta["N"]
+        self.avgdl = meta["avgdl"]
+        self.n_terms = meta["terms"]
+        self.norms = sections["norms"]
+        self.doc_lengths = sections["doc_lengths"]
+        self._buffer = buffer
+        self._sections = sections
+        self._rows = {}  # term (id or unknown-token string) -> row, for terms in the index only
+
+    def _row(self, term):
+        """Row of a term (id, or a token string the analyzer does not know) in the term table, or -1"""
+        row = self._rows.get(term)
+        if row is None:
+            token = (term if isinstance(term, str) else ANALYZER.tokens[term]).encode('utf-8')
+            offsets, buffer = self._sections["term_offsets"], self._buffer
+            lo, hi = 0, self.n_terms
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if buffer[offsets[mid]:offsets[mid + 1]] < token:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < self.n_terms and buffer[offsets[lo]:offsets[lo + 1]] == token:
+                row = self._rows[term] = lo  # bounded by the index vocabulary; misses are not memoized
+            else:
+                row = -1
+        return row
+
+    def __getstate__(self):
+        raise TypeError(f"{type(self).__name__} is backed by a memory map and cannot be pickled")
+
+    def fit(self, documents):
+        raise TypeError(f"{type(self).__name__} is read-only; rebuild it with write_binary_index()")
+
+    def nbytes(self):
+        """Private memory only: mapped pages are shared with other processes"""
+        return 4096 + 64 * len(self._rows)
+
+
+class MappedBM25(_MappedTerms, BM25):
+    """BM25 scored straight from a memory-mapped binary index (see write_binary_index)"""
+
+    def __init__(self, meta, buffer, sections):
+        self._attach(meta, buffer, sections)
+        offsets = sections["post_offsets"]
+        self.idf = _TermView(self, sections["idf"].__getitem__)
+        self.max_impact = _TermView(self, sections["max_impact"].__getitem__)
+        self.doc_freqs = _TermView(self, lambda row: offsets[row + 1] - offsets[row])
+        self.postings = _TermView(self, self._postings_at)
+
+    def _postings_at(self, row):
+        """[(doc_id, tf), ...] of one term, read from the mapped arrays"""
+        start, end = self._sections["post_offsets"][row], self._sections["post_offsets"][row + 1]
+        return list(zip(self._sections["post_docs"][start:end], self._sections["post_tfs"][start:end]))
+
+
+class MappedSparseBM25(_MappedTerms, SparseBM25):
+    """SparseBM25 over a memory-mapped binary index: the CSC impact matrix wraps the mapped arrays"""
+
+    def __init__(self, meta, buffer, sections):
+        np, sparse = _import_sparse()
+        self._attach(meta, buffer, sections)
+        self.vocab = _TermView(self, int)  # term id -> row, which is the matrix column
+        self.matrix = sparse.csc_matrix((
+            np.frombuffer(sections["impacts"], dtype=np.float64),
+            np.frombuffer(sections["post_docs"], dtype=np.int32),
+            np.frombuffer(sections["post_offsets"], dtype=np.int32),
+        ), shape=(self.N, self.n_terms), copy=False)
+
+
+# ============ INDEX REGISTRY ============
+class IndexRegistry:
+    """
+    Process-wide LRU of fitted indexes, one per (domain/stack, file).
+
+    Safe to share between fan_out threads: lookups take one registry lock, and a
+    missing index is loaded under a per-key build lock, so different files load
+    concurrently while concurrent requests for the same file load it once.
+
+    Every lookup stats the CSV; when it changed since it was indexed, the index
+    is refreshed (incrementally where possible), so a long-running daemon sees
+    edited data files without a restart.
+    """
+
+    def __init__(self, max_bytes=REGISTRY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (index, nbytes)
+        self._lock = threading.Lock()
+        self._building = {}  # key -> lock held while that index loads
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        """Cached index for key, marked most recently used, or None; caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key, filepath, search_cols, output_cols, backend=None):
+        """Return the fitted index for key, loading it on first use and refreshing it when its CSV changed"""
+        with self._lock:
+            index = self._lookup(key)
+        if index is not None and index.is_current():
+            with self._lock:
+                self.hits += 1
+            return index
+
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                previous = self._lookup(key)  # may have been (re)loaded by another thread while we waited
+            if previous is not None and previous.is_current():
+                with self._lock:
+                    self.hits += 1
+                return previous
+            try:
+                index = load_index(filepath, search_cols, output_cols, backend, previous)
+                nbytes = index.nbytes()
+                with self._lock:
+                    if previous is None:
+                        self.misses += 1
+                    else:
+                        self.refreshes += 1
+                    old = self._entries.pop(key, None)
+                    if old is not None:
+                        self.total_bytes -= old[1]
+                    self._entries[key] = (index, nbytes)
+                    self.total_bytes += nbytes
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return index
+
+    def _evict(self):
+        """Drop least recently used indexes until under the memory cap (keeps the newest); caller holds the lock"""
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.total_bytes -= nbytes
+            self.evictions += 1
+
+    def invalidate(self, name=None):
+        """Drop every index (name=None) or those registered under a domain/stack name"""
+        with self._lock:
+            for key in [k for k in self._entries if name is None or k[0] == name]:
+                _, nbytes = self._entries.pop(key)
+                self.total_bytes -= nbytes
+
+    def stats(self):
+        """Hit/miss/eviction counters and current footprint"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+            }
+
+
+INDEX_REGISTRY = IndexRegistry()
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """
+    LRU of search results keyed by (domain/stack, file, backend, query tokens,
+    max_results, CSV size, CSV mtime), in front of search() and search_stack().
+
+    The CSV size/mtime in the key is the data version: an edited file simply
+    stops matching its old entries, which then age out. Entries optionally
+    expire after ttl seconds, and the cache can be persisted to a file so
+    repeated CLI runs hit it too. Results are copied in and out, so callers
+    may mutate what they get.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()  # key -> (expires_at or None, rows)
+        self._lock = threading.Lock()
+        self._loaded = path is None
+        self._dirty = False
+        self._save_registered = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Copy of the cached rows for key, or None"""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self._changed()
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(row) for row in entry[1]]
+
+    def put(self, key, rows):
+        """Store a copy of rows under key, evicting the least recently used entries over max_entries"""
+        if not self.max_entries:
+            return
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._load()
+            self._entries[key] = (expires, [dict(row) for row in rows])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._changed()
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._loaded = True
+            self._entries.clear()
+            self._changed()
+
+    def _changed(self):
+        """Mark entries as unsaved, saving them at exit when persisted; caller holds the lock"""
+        self._dirty = True
+        if self.path is not None and not self._save_registered:
+            import atexit
+            atexit.register(self.save)
+            self._save_registered = True
+
+    def _load(self):
+        """Read the persisted entries on first use; caller holds the lock"""
+        if self._loaded:
+            return
+        self._loaded = True
+        entry = _read_cache(self.path, f"results|tok{TOKENIZER_VERSION}|idx{INDEX_VERSION}")
+        if entry:
+            now = time.time()
+            for key, (expires, rows) in entry["entries"]:
+                if expires is None or expires >= now:
+                    self._entries[key] = (expires, rows)
+
+    def save(self):
+        """Persist the entries to path (best-effort, like the index cache)"""
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+            entries = list(self._entries.items())[-self.max_entries:]
+            self._dirty = False
+        _write_cache(self.path, {"key": f"results|tok{TOKENIZER_VERSION}|idx{INDEX_VERSION}", "entries": entries})
+
+    def stats(self):
+        """Hit/miss/eviction/expiration counters and current size"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "persisted": self.path is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+RESULT_CACHE = ResultCache(path=CACHE_DIR / "results.cache" if RESULT_CACHE_PERSIST and CACHE_DIR else None)
+
+
+# ============ DOMAIN DETECTION ============
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a {label: [keywords]} table.
+
+    Finds every keyword occurring as a substring of a text in one pass over the
+    text's characters, however many keywords the table has.
+    """
+
+    def __init__(self, table):
+        self.labels = list(table)
+        self.keyword_labels = []  # keyword id -> labels it belongs to
+        keyword_ids = {}
+        goto = [{}]  # node -> {char: node}
+        out = [[]]  # node -> keyword ids ending there
+        for label, keywords in table.items():
+            for keyword in keywords:
+                kid = keyword_ids.get(keyword)
+                if kid is None:
+                    kid = keyword_ids[keyword] = len(self.keyword_labels)
+                    self.keyword_labels.append([])
+                    node = 0
+                    for ch in keyword:
+                        if ch not in goto[node]:
+                            goto[node][ch] = len(goto)
+                            goto.append({})
+                            out.append([])
+                        node = goto[node][ch]
+                    out[node].append(kid)
+                if label not in self.keyword_labels[kid]:
+                    self.keyword_labels[kid].append(label)
+
+        # Failure links, breadth first: the longest proper suffix that is also a trie path
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0) if node else 0
+                out[child] = out[child] + out[fail[child]]
+        self.goto = goto
+        self.fail = fail
+        self.out = [tuple(ids) for ids in out]
 
+    def matches(self, text):
+        """Ids of the distinct keywords occurring in text"""
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def scores(self, text):
+        """{label: number of its distinct keywords occurring in text}, in table order"""
+        scores = dict.fromkeys(self.labels, 0)
+        for kid in self.matches(text):
+            for label in self.keyword_labels[kid]:
+                scores[label] += 1
+        return scores
+
+
+# ============ SEARCH FUNCTIONS ============
+def _get_index(filepath, search_cols, output_cols, name=None):
+    """Registry lookup for the index of a file registered under a domain/stack name"""
+    backend = resolve_backend()
+    key = (name, str(filepath), backend)
+    return INDEX_REGISTRY.get(key, filepath, search_cols, output_cols, backend)
+
+
+def _search_csv(filepath, search_cols, output_cols, query, max_results, name=None):
+    """Core search function using BM25 (name is the domain/stack the file is registered under)"""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return []
+
+    key = None
+    if RESULT_CACHE.max_entries:
+        key = (name, str(filepath), resolve_backend(), ANALYZER.query_tokens(query), max_results, stat.st_size, stat.st_mtime_ns)
+        results = RESULT_CACHE.get(key)
+        if results is not None:
+            return results
+
+    results = _with_index(filepath, search_cols, output_cols, name, lambda index: index.search(query, max_results))
+    if key is not None:
+        RESULT_CACHE.put(key, results)
     return results
 
 
+def _with_index(filepath, search_cols, output_cols, name, fn):
+    """Call fn(index), rebuilding once if the CSV changed between the index lookup and reading result rows"""
+    try:
+        return fn(_get_index(filepath, search_cols, output_cols, name))
+    except StaleIndexError:
+        INDEX_REGISTRY.invalidate(name)
+        return fn(_get_index(filepath, search_cols, output_cols, name))
+
+
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
+    ranked = detect_domains(query)
+    return ranked[0][0] if ranked else "style"
+
+
+def detect_domains(query, top=None):
+    """
+    Domains whose keywords occur in query, as (domain, score) pairs, best first.
+
+    The score is the number of distinct keywords of the domain found as
+    substrings of the lower-cased query; ties keep DOMAIN_KEYWORDS order. All
+    keywords are matched in one pass by an Aho-Corasick automaton, and results
+    are cached per query.
+    """
+    ranked = _ranked_domains(query.lower())
+    return list(ranked if top is None else ranked[:top])
+
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _ranked_domains(query_lower):
+    scores = _domain_matcher().scores(query_lower)
+    ranked = sorted(((domain, score) for domain, score in scores.items() if score > 0), key=lambda item: -item[1])
+    return tuple(ranked)
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
+
+@functools.lru_cache(maxsize=None)
+def _domain_matcher():
+    return KeywordMatcher(DOMAIN_KEYWORDS)
 
 
 def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+    """Main search function with auto-domain detection (domain="all" searches every domain and stack)"""
     if domain is None:
         domain = detect_domain(query)
+    if domain == "all":
+        return search_all(query, max_results)
 
     config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     filepath = DATA_DIR / config["file"]
@@ -220,7 +1765,8 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    name = domain if domain in CSV_CONFIG else "style"
+    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results, name)
 
     return {
         "domain": domain,
@@ -241,7 +1787,7 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results, f"stack:{stack}")
 
     return {
         "domain": "stack",
@@ -251,3 +1797,349 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+
+
+# ============ BATCH SEARCH ============
+def search_many(queries, domain=None, max_results=MAX_RESULTS):
+    """
+    search() for many queries at once, returned in input order.
+
+    Queries are grouped by domain (auto-detected per query when domain is None)
+    so each index is fetched once and every group is scored in one batch.
+    """
+    queries = list(queries)
+    groups = defaultdict(list)
+    for pos, query in enumerate(queries):
+        groups[domain if domain is not None else detect_domain(query)].append(pos)
+
+    output = [None] * len(queries)
+    for group_domain, positions in groups.items():
+        if group_domain == "all":
+            for pos in positions:
+                output[pos] = search_all(queries[pos], max_results)
+            continue
+        config = CSV_CONFIG.get(group_domain, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
+        if not filepath.exists():
+            for pos in positions:
+                output[pos] = {"error": f"File not found: {filepath}", "domain": group_domain}
+            continue
+
+        name = group_domain if group_domain in CSV_CONFIG else "style"
+        group_queries = [queries[pos] for pos in positions]
+        ranked = _with_index(filepath, config["search_cols"], config["output_cols"], name,
+                             lambda index: index.search_many(group_queries, max_results))
+        for pos, query, results in zip(positions, group_queries, ranked):
+            output[pos] = {
+                "domain": group_domain,
+                "query": query,
+                "file": config["file"],
+                "count": len(results),
+                "results": results
+            }
+    return output
+
+
+def search_stack_many(queries, stack, max_results=MAX_RESULTS):
+    """search_stack() for many queries against one stack, returned in input order"""
+    queries = list(queries)
+    if stack not in STACK_CONFIG:
+        return [{"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"} for _ in queries]
+
+    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+    if not filepath.exists():
+        return [{"error": f"Stack file not found: {filepath}", "stack": stack} for _ in queries]
+
+    ranked = _with_index(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], f"stack:{stack}",
+                         lambda index: index.search_many(queries, max_results))
+    return [{
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": STACK_CONFIG[stack]["file"],
+        "count": len(results),
+        "results": results
+    } for query, results in zip(queries, ranked)]
+
+
+# ============ FEDERATED INDEX ============
+def _facets():
+    """(facet name, file, search_cols, output_cols) of every domain and stack CSV, in config order"""
+    facets = [(domain, config["file"], config["search_cols"], config["output_cols"]) for domain, config in CSV_CONFIG.items()]
+    facets += [(f"stack:{stack}", config["file"], _STACK_COLS["search_cols"], _STACK_COLS["output_cols"])
+               for stack, config in STACK_CONFIG.items()]
+    return facets
+
+
+class FederatedIndex:
+    """
+    One inverted index over every domain and stack CSV, faceted by source file.
+
+    Each posting stores its document's BM25 impact computed with its own file's
+    IDF and length normalization, so a facet ranks exactly as its per-file index
+    does, and one pass over the query terms' postings scores every facet.
+    """
+
+    def __init__(self):
+        self.facets = []  # [(name, file, output_cols, store)]
+        self.starts = []  # first global doc id of each facet
+        self.doc_facet = []  # global doc id -> facet number
+        self.postings = {}  # term -> [(doc_id, impact), ...] in doc_id order
+        self.N = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["postings"] = {ANALYZER.tokens[term]: plist for term, plist in self.postings.items()}
+        return state
+
+    def __setstate__(self, state):
+        term_id = ANALYZER.term_id
+        state["postings"] = {term_id(token): plist for token, plist in state["postings"].items()}
+        self.__dict__.update(state)
+
+    def add(self, name, filepath, search_cols, output_cols):
+        """Fit one CSV and append it as a facet"""
+        store = ColumnStore.from_csv(filepath, search_cols)
+        bm25 = BM25()
+        bm25.fit(store.documents(search_cols))
+        start = self.N
+        k1_plus_1 = bm25.k1 + 1
+        norms = bm25.norms
+        for term, plist in bm25.postings.items():
+            idf = bm25.idf[term]
+            self.postings.setdefault(term, []).extend(
+                (start + doc_id, idf * (tf * k1_plus_1) / (tf + norms[doc_id])) for doc_id, tf in plist)
+        self.doc_facet.extend([len(self.facets)] * bm25.N)
+        self.facets.append((name, Path(filepath).name, list(output_cols), store))
+        self.starts.append(start)
+        self.N += bm25.N
+
+    def nbytes(self):
+        """Approximate memory footprint: postings tuples plus the column stores"""
+        n_postings = sum(len(plist) for plist in self.postings.values())
+        return n_postings * 64 + len(self.postings) * 256 + self.N * 8 + sum(store.nbytes() for *_, store in self.facets)
+
+    def _ranked(self, query, facets=None):
+        """(-score, doc_id) of every matching document, per facet number, best first"""
+        terms = query if isinstance(query, tuple) else ANALYZER.analyze(query)
+        scores = {}
+        with TIMINGS.span("search/score"):
+            for term in terms:  # summed in query order, as BM25.top_k does
+                for doc_id, impact in self.postings.get(term, ()):
+                    scores[doc_id] = scores.get(doc_id, 0) + impact
+            ranked = defaultdict(list)
+            doc_facet = self.doc_facet
+            for doc_id, score in scores.items():
+                ranked[doc_facet[doc_id]].append((-score, doc_id))
+            if facets is not None:
+                ranked = {facet: hits for facet, hits in ranked.items() if self.facets[facet][0] in facets}
+        return ranked
+
+    def _row(self, facet, doc_id):
+        _, _, output_cols, store = self.facets[facet]
+        return store.row(doc_id - self.starts[facet], output_cols)
+
+    def search(self, query, max_results, facets=None):
+        """{facet name: output rows of its top results}, for facets with hits, in config order"""
+        ranked = self._ranked(query, facets)
+        return {self.facets[facet][0]: [self._row(facet, doc_id) for _, doc_id in heapq.nsmallest(max_results, ranked[facet])]
+                for facet in sorted(ranked)}
+
+    def search_global(self, query, max_results, facets=None):
+        """[(facet name, file, row)] of the top results across all facets (scores are per-file BM25)"""
+        ranked = self._ranked(query, facets)
+        hits = heapq.nsmallest(max_results, (hit for facet_hits in ranked.values() for hit in facet_hits))
+        return [(self.facets[self.doc_facet[doc_id]][0], self.facets[self.doc_facet[doc_id]][1],
+                 self._row(self.doc_facet[doc_id], doc_id)) for _, doc_id in hits]
+
+
+_FEDERATED = {}  # "index" -> (signature, FederatedIndex)
+_FEDERATED_LOCK = threading.Lock()
+
+
+def _federated_signature():
+    """(file, size, mtime_ns) of every facet CSV that exists"""
+    signature = []
+    for _, filename, _, _ in _facets():
+        try:
+            stat = (DATA_DIR / filename).stat()
+        except OSError:
+            continue
+        signature.append((filename, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def federated_index():
+    """The FederatedIndex of DATA_DIR, rebuilt when any CSV changes and cached on disk like per-file indexes"""
+    signature = _federated_signature()
+    with _FEDERATED_LOCK:
+        cached = _FEDERATED.get("index")
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        key = "|".join([str(DATA_DIR.resolve()), "federated", f"tok{TOKENIZER_VERSION}", f"idx{INDEX_VERSION}"]
+                       + [f"{name}:{','.join(search_cols)}:{','.join(output_cols)}" for name, _, search_cols, output_cols in _facets()])
+        cache_file = _cache_path(Path("federated"), key) if CACHE_DIR is not None else None
+        index = None
+        if cache_file is not None:
+            with TIMINGS.span("index/cache_read"):
+                entry = _read_cache(cache_file, key)
+            if entry and entry["files"] == signature:
+                index = entry["index"]
+        if index is None:
+            index = FederatedIndex()
+            with TIMINGS.span("index/federated_build"):
+                for name, filename, search_cols, output_cols in _facets():
+                    if (DATA_DIR / filename).exists():
+                        index.add(name, DATA_DIR / filename, search_cols, output_cols)
+            if cache_file is not None:
+                _write_cache(cache_file, {"key": key, "files": signature, "index": index})
+        _FEDERATED["index"] = (signature, index)
+        return index
+
+
+def search_all(query, max_results=MAX_RESULTS, merged=False, facets=None):
+    """
+    Search every domain and stack in one scoring pass over the federated index.
+
+    Returns one search()/search_stack()-shaped result per facet with hits under
+    "facets" or, with merged=True, a global top-k under "results" as
+    {"source", "file", "row"} entries. facets limits the search to the given
+    domain names and "stack:<name>" facets.
+    """
+    for attempt in range(2):
+        index = federated_index()
+        try:
+            hits = index.search_global(query, max_results, facets) if merged else index.search(query, max_results, facets)
+            break
+        except StaleIndexError:
+            if attempt:
+                raise
+            with _FEDERATED_LOCK:
+                _FEDERATED.clear()
+
+    if merged:
+        return {
+            "domain": "all",
+            "query": query,
+            "count": len(hits),
+            "results": [{"source": name, "file": filename, "row": row} for name, filename, row in hits]
+        }
+
+    files = {name: filename for name, filename, _, _ in _facets()}
+    results = []
+    for name, rows in hits.items():
+        result = {"domain": "stack", "stack": name[len("stack:"):]} if name.startswith("stack:") else {"domain": name}
+        result.update(query=query, file=files[name], count=len(rows), results=rows)
+        results.append(result)
+    return {"domain": "all", "query": query, "count": sum(r["count"] for r in results), "facets": results}
+
+
+# ============ FAN-OUT ============
+_PROCESS_POOLS = {}  # workers -> ProcessPoolExecutor, created on first use and reused
+_POOLS_LOCK = threading.Lock()
+_FAN_OUT = threading.local()
+
+
+def _process_pool(workers):
+    """Shared process pool (concurrent.futures is only imported for process mode: it pulls in logging)"""
+    with _POOLS_LOCK:
+        pool = _PROCESS_POOLS.get(workers)
+        if pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = _PROCESS_POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+def _pooled_call(fn, args):
+    """Run fn(*args) on a fan_out worker, marking the worker so nested fan_outs run serially"""
+    _FAN_OUT.active = True
+    try:
+        return fn(*args)
+    finally:
+        _FAN_OUT.active = False
+
+
+def _thread_map(fn, calls, workers):
+    """fn(*args) for every call on up to workers short-lived threads; re-raises the first failure in input order"""
+    results = [None] * len(calls)
+    errors = [None] * len(calls)
+    pending = iter(range(len(calls)))
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                i = next(pending, None)
+            if i is None:
+                return
+            try:
+                results[i] = _pooled_call(fn, calls[i])
+            except BaseException as e:
+                errors[i] = e
+
+    threads = [threading.Thread(target=work, name=f"uipro-{n}", daemon=True) for n in range(min(workers, len(calls)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
+
+
+def fan_out(fn, calls, mode=None, workers=None):
+    """
+    Call fn(*args) for every args tuple in calls; results come back in input order.
+
+    mode is "thread", "process" or "serial" (default PARALLEL_MODE). Threads share
+    this process's index registry, so cold indexes load concurrently (one load per
+    file); processes sidestep the GIL for CPU-bound fits, keep their own warm
+    registries and need fn and its arguments to be picklable. Calls run serially
+    with a single worker or inside another fan_out, so nesting cannot starve a pool.
+    """
+    calls = [tuple(args) for args in calls]
+    mode = mode or PARALLEL_MODE
+    if mode not in ("thread", "process", "serial"):
+        raise ValueError(f"Unknown parallel mode: {mode}. Available: thread, process, serial")
+    workers = workers or PARALLEL_WORKERS
+    if mode == "serial" or workers < 2 or len(calls) < 2 or getattr(_FAN_OUT, "active", False):
+        return [fn(*args) for args in calls]
+    if mode == "process":
+        return list(_process_pool(workers).map(_pooled_call, [fn] * len(calls), calls))
+    return _thread_map(fn, calls, workers)
+
+
+# ============ WARM-UP ============
+def _warm_index(name, filename, search_cols, output_cols):
+    """Load (building and caching if needed) one file's index; returns its summary"""
+    filepath = DATA_DIR / filename
+    start = time.perf_counter()
+    index = _get_index(filepath, search_cols, output_cols, name)
+    seconds = time.perf_counter() - start
+    bm25 = index.bm25
+    return {
+        "name": name,
+        "file": filename,
+        "ms": seconds * 1000,
+        "docs": bm25.N,
+        "terms": len(bm25.vocab) if hasattr(bm25, "vocab") else len(bm25.idf),
+        "bytes": index.nbytes(),
+    }
+
+
+def warm_all(mode="process", workers=None):
+    """
+    Build or load the index of every domain and stack CSV, fanned out over
+    mode's pool (see fan_out); returns one summary dict per file, in config order.
+
+    Process workers fit cold files on separate cores and leave the results in the
+    on-disk index cache for later runs. With the cache disabled there is nothing
+    to hand back (workers only read binary indexes, never write them), so the
+    indexes are built on threads of this process.
+    """
+    if mode == "process" and CACHE_DIR is None:
+        mode = "thread"
+    facets = [facet for facet in _facets() if (DATA_DIR / facet[1]).exists()]
+    return fan_out(_warm_index, facets, mode, workers)
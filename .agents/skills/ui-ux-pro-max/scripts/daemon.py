@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search Daemon - Keeps BM25 indexes warm and answers JSON-lines requests
+over stdin/stdout or a Unix domain socket.
+
+Usage:
+    python search.py --serve                      # JSON lines on stdin/stdout
+    python search.py --serve --socket /tmp/ui.sock
+    python search.py --client "<query>" --domain ux   # forward to a running daemon
+
+Requests (one JSON object per line, one JSON response per line):
+    {"op": "search", "query": "...", "domain": "ux", "max_results": 3}   # "all": every domain/stack
+    {"op": "search_stack", "query": "...", "stack": "react", "max_results": 3}
+    {"op": "design_system", "query": "...", "project_name": "...", "format": "ascii"}   # "page": name or list
+    {"op": "argv", "argv": ["<query>", "--domain", "ux"], "cwd": "/path"}
+    {"op": "stats"} | {"op": "ping"} | {"op": "shutdown"}
+
+Responses are {"ok": true, ...} or {"ok": false, "error": "..."}.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+
+# core/design_system and the server modules are imported where they are used, so
+# the thin --client path stays cheap.
+
+
+# ============ CONFIGURATION ============
+CONNECT_TIMEOUT = 0.5  # seconds; a daemon that does not accept by then is treated as absent
+
+
+def default_socket():
+    """$UIPRO_SOCKET, or a per-user socket path in the temp dir"""
+    if os.environ.get("UIPRO_SOCKET"):
+        return os.environ["UIPRO_SOCKET"]
+    import tempfile
+    user = getattr(os, "getuid", lambda: "user")()
+    return os.path.join(tempfile.gettempdir(), f"ui-ux-pro-max-{user}.sock")
+
+
+class _Shutdown(Exception):
+    """Raised by the shutdown op to stop the serving loop"""
+
+
+# ============ REQUEST HANDLING ============
+def _run_argv(argv, cwd, cli_main):
+    """Run the CLI in-process, capturing its output and exit code (stdin reads as empty)"""
+    if "--serve" in argv:  # would block this worker on the daemon's own stdin or socket
+        return {"stdout": "", "stderr": "Error: --serve cannot run inside the daemon\n", "exit_code": 2}
+    stdout, stderr = io.StringIO(), io.StringIO()
+    previous_cwd, previous_stdin = os.getcwd(), sys.stdin
+    try:
+        if cwd:
+            os.chdir(cwd)
+        sys.stdin = io.StringIO()  # the daemon's stdin carries requests, not this command's input
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                exit_code = cli_main(argv)
+            except SystemExit as e:  # argparse errors and --help
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        sys.stdin = previous_stdin
+        os.chdir(previous_cwd)
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code or 0}
+
+
+def handle_request(request, cli_main):
+    """Dispatch one decoded request; returns the response dict"""
+    if not isinstance(request, dict):
+        return {"ok": False, "error": "Request must be a JSON object"}
+
+    from core import ANALYZER, INDEX_REGISTRY, MAX_RESULTS, RESULT_CACHE, search, search_stack
+
+    op = request.get("op")
+    try:
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "stats":
+            return {"ok": True, "registry": INDEX_REGISTRY.stats(), "analyzer": ANALYZER.stats(), "results": RESULT_CACHE.stats()}
+        if op == "shutdown":
+            raise _Shutdown()
+        if op == "search":
+            result = search(request["query"], request.get("domain"), request.get("max_results", MAX_RESULTS))
+            return {"ok": True, "result": result}
+        if op == "search_stack":
+            result = search_stack(request["query"], request["stack"], request.get("max_results", MAX_RESULTS))
+            return {"ok": True, "result": result}
+        if op == "design_system":
+            from design_system import generate_design_system
+            result = generate_design_system(
+                request["query"],
+                request.get("project_name"),
+                request.get("format", "ascii"),
+                persist=request.get("persist", False),
+                page=request.get("page"),
+                output_dir=request.get("output_dir")
+            )
+            return {"ok": True, "result": result}
+        if op == "argv":
+            return {"ok": True, **_run_argv(request.get("argv", []), request.get("cwd"), cli_main)}
+    except _Shutdown:
+        raise
+    except KeyError as e:
+        return {"ok": False, "error": f"Missing field: {e.args[0]}"}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    return {"ok": False, "error": f"Unknown op: {op}"}
+
+
+def _handle_line(line, cli_main):
+    """Decode one request line and encode its response line"""
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        response = {"ok": False, "error": f"Invalid JSON: {e.msg}"}
+    else:
+        response = handle_request(request, cli_main)
+    return json.dumps(response, ensure_ascii=False) + "\n"
+
+
+# ============ SERVERS ============
+def serve_stdio(cli_main, stdin=None, stdout=None):
+    """Answer requests read from stdin until EOF or a shutdown op"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            stdout.write(_handle_line(line, cli_main))
+        except _Shutdown:
+            stdout.write(json.dumps({"ok": True, "shutdown": True}) + "\n")
+            stdout.flush()
+            return
+        stdout.flush()
+
+
+def serve_socket(path, cli_main):
+    """
+    Answer requests on a Unix domain socket until a shutdown op.
+
+    Connections are handled one at a time, so requests never race on the
+    shared index registry or on the working directory used by argv requests.
+    """
+    import socketserver
+
+    path = path or default_socket()
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8")
+                if not line.strip():
+                    continue
+                try:
+                    self.wfile.write(_handle_line(line, cli_main).encode("utf-8"))
+                except _Shutdown:
+                    self.wfile.write(b'{"ok": true, "shutdown": true}\n')
+                    self.server.stopping = True
+                    return
+
+    server = socketserver.UnixStreamServer(path, Handler)
+    server.stopping = False
+    try:
+        while not server.stopping:
+            server.handle_request()
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+# ============ CLIENT ============
+def request(payload, path=None):
+    """Send one request to a running daemon; returns the response, or None if none is running"""
+    path = path or default_socket()
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(None)
+            sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+    except OSError:
+        return None
+    return json.loads(line) if line else None
+
+
+def forward(argv, path=None):
+    """
+    Run CLI arguments on a running daemon, echoing its output.
+
+    Returns the exit code, or None when no daemon answered so the caller can
+    fall back to in-process execution.
+    """
+    response = request({"op": "argv", "argv": list(argv), "cwd": os.getcwd()}, path)
+    if not response or not response.get("ok"):
+        return None
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
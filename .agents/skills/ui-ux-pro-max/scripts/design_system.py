@@ -11,14 +11,21 @@ Usage:
     # With persistence (Master + Overrides pattern)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
+    result = generate_design_system("SaaS dashboard", "My Project", persist=True, page=["dashboard", "settings"])
+
+    # Many projects at once, on a worker pool (results in input order)
+    results = generate_design_systems(["SaaS dashboard", {"query": "spa wellness", "project_name": "Serenity"}])
 """
 
+import contextlib
 import csv
+import functools
 import json
 import os
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+import core
+from core import search, fan_out, KeywordMatcher, DATA_DIR, TIMINGS
 
 
 # ============ CONFIGURATION ============
@@ -32,76 +39,50 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+MANIFEST_FILE = ".manifest.json"  # content hash, size and mtime of the persisted files, per project folder
 
-# ============ DESIGN SYSTEM GENERATOR ============
-class DesignSystemGenerator:
-    """Generates design system recommendations from aggregated searches."""
 
-    def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+# ============ REASONING RULES ============
+DEFAULT_REASONING = {
+    "pattern": "Hero + Features + CTA",
+    "style_priority": ["Minimalism", "Flat Design"],
+    "color_mood": "Professional",
+    "typography_mood": "Clean",
+    "key_effects": "Subtle hover transitions",
+    "anti_patterns": "",
+    "decision_rules": {},
+    "severity": "MEDIUM"
+}
 
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
-        if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
-
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
+class ReasoningIndex:
+    """
+    Reasoning rules with precomputed lookup tables.
 
-        return {}
+    Resolution keeps the order of the original three passes (exact, partial,
+    keyword; first rule wins within each): exact matches are one dict lookup,
+    and the rule categories and their keywords found inside a category come
+    from one KeywordMatcher pass each. Only "category inside a rule category"
+    still scans, over pre-lowered strings and only up to the best match so far.
+    """
 
-    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
-        """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
-
-        if not rule:
-            return {
-                "pattern": "Hero + Features + CTA",
-                "style_priority": ["Minimalism", "Flat Design"],
-                "color_mood": "Professional",
-                "typography_mood": "Clean",
-                "key_effects": "Subtle hover transitions",
-                "anti_patterns": "",
-                "decision_rules": {},
-                "severity": "MEDIUM"
-            }
-
-        # Parse decision rules JSON
+    def __init__(self, rules):
+        self.rules = rules
+        self.categories = [rule.get("UI_Category", "").lower() for rule in rules]
+        self.exact = {}
+        for i, ui_cat in enumerate(self.categories):
+            self.exact.setdefault(ui_cat, i)
+        self.partial = KeywordMatcher({i: [ui_cat] for i, ui_cat in enumerate(self.categories) if ui_cat})
+        self.keywords = KeywordMatcher({
+            i: ui_cat.replace("/", " ").replace("-", " ").split()
+            for i, ui_cat in enumerate(self.categories)
+        })
+        self.reasoning = [self._parse(rule) for rule in rules]
+        self.find = functools.lru_cache(maxsize=256)(self._find)
+
+    @staticmethod
+    def _parse(rule):
+        """Reasoning dict of one rule, with Decision_Rules JSON parsed once"""
         decision_rules = {}
         try:
             decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
@@ -119,6 +100,172 @@ class DesignSystemGenerator:
             "severity": rule.get("Severity", "MEDIUM")
         }
 
+    @staticmethod
+    def _first(matcher, text):
+        """Lowest rule index with a keyword occurring in text (None if none)"""
+        return min((matcher.keyword_labels[kid][0] for kid in matcher.matches(text)), default=None)
+
+    def _find(self, category_lower):
+        """Index of the matching rule for a lowercased category, or None"""
+        i = self.exact.get(category_lower)
+        if i is not None:
+            return i
+
+        # Partial match: rule category inside the category, or the reverse
+        best = self._first(self.partial, category_lower)
+        if "" in self.exact:
+            best = min(self.exact[""], best if best is not None else len(self.categories))
+        for j, ui_cat in enumerate(self.categories[:best]):
+            if category_lower in ui_cat:
+                best = j
+                break
+        if best is not None:
+            return best
+
+        # Keyword match
+        return self._first(self.keywords, category_lower)
+
+    def rule(self, category):
+        """Matching rule row for a category ({} if none)"""
+        i = self.find(category.lower())
+        return self.rules[i] if i is not None else {}
+
+    def apply(self, category):
+        """Reasoning dict for a category (defaults if no rule matches); safe to mutate"""
+        i = self.find(category.lower())
+        reasoning = self.reasoning[i] if i is not None else DEFAULT_REASONING
+        return {
+            **reasoning,
+            "style_priority": list(reasoning["style_priority"]),
+            "decision_rules": dict(reasoning["decision_rules"])
+        }
+
+
+@functools.lru_cache(maxsize=1)
+def _reasoning_index(filepath, mtime_ns, size):
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return ReasoningIndex(list(csv.DictReader(f)))
+
+
+def load_reasoning():
+    """ReasoningIndex over ui-reasoning.csv, parsed once per process (and again if the file changes)"""
+    filepath = DATA_DIR / REASONING_FILE
+    try:
+        stat = filepath.stat()
+    except FileNotFoundError:
+        return ReasoningIndex([])
+    return _reasoning_index(filepath, stat.st_mtime_ns, stat.st_size)
+
+
+# ============ SEARCH PLAN ============
+class SearchPlan:
+    """
+    Query planner for the searches of one design-system call.
+
+    Requests are (query, domain, max_results); run() searches each distinct
+    (query, domain) once, at the largest max_results asked for, and get()
+    serves narrower requests by slicing that result (top-k is a prefix of
+    any larger top-k). Requests can be added in rounds: run() only fetches
+    what earlier rounds have not.
+    """
+
+    def __init__(self):
+        self.wanted = {}  # (query, domain) -> largest max_results requested
+        self.results = {}  # (query, domain) -> (max_results fetched, search result)
+
+    def add(self, query: str, domain: str, max_results: int):
+        key = (query, domain)
+        self.wanted[key] = max(max_results, self.wanted.get(key, 0))
+
+    def run(self):
+        """Fetch every request not yet covered, concurrently (see core.fan_out)"""
+        pending = [key for key, k in self.wanted.items() if key not in self.results or self.results[key][0] < k]
+        fetched = fan_out(search, [(query, domain, self.wanted[(query, domain)]) for query, domain in pending])
+        for key, result in zip(pending, fetched):
+            self.results[key] = (self.wanted[key], result)
+
+    def get(self, query: str, domain: str, max_results: int) -> dict:
+        """Result of search(query, domain, max_results); searches directly if it was not planned"""
+        fetched_k, result = self.results.get((query, domain), (0, None))
+        if fetched_k < max_results:
+            return search(query, domain, max_results)
+        if "results" not in result or fetched_k == max_results:
+            return result
+        results = result["results"][:max_results]
+        return {**result, "count": len(results), "results": results}
+
+
+def _override_searches(page_name: str, page_query: str) -> list:
+    """(query, domain, max_results) searches behind a page's intelligent overrides"""
+    combined_context = f"{page_name.lower()} {(page_query or '').lower()}"
+    return [
+        (combined_context, "style", 1),
+        (combined_context, "ux", 3),
+        (combined_context, "landing", 1),
+    ]
+
+
+def _page_names(page) -> list:
+    """Page names from a page argument (a name or a list of names)"""
+    return list(filter(None, [page] if isinstance(page, str) else page or []))
+
+
+def _plan_pages(page, page_query: str, plan: SearchPlan = None) -> SearchPlan:
+    """plan (or a new one) with the override searches of every page added"""
+    plan = plan or SearchPlan()
+    for name in _page_names(page):
+        for request in _override_searches(name, page_query):
+            plan.add(*request)
+    return plan
+
+
+def warm_reasoning() -> dict:
+    """Load the reasoning rules; returns a core.warm_all-style summary"""
+    import time
+    start = time.perf_counter()
+    index = load_reasoning()
+    return {
+        "name": "reasoning",
+        "file": REASONING_FILE,
+        "ms": (time.perf_counter() - start) * 1000,
+        "docs": len(index.rules),
+        "terms": len(index.keywords.keyword_labels),
+        "bytes": None,
+    }
+
+
+# ============ DESIGN SYSTEM GENERATOR ============
+class DesignSystemGenerator:
+    """Generates design system recommendations from aggregated searches."""
+
+    def __init__(self):
+        self.reasoning = load_reasoning()
+        self.reasoning_data = self.reasoning.rules
+
+    def _multi_domain_search(self, query: str, style_priority: list = None, plan: SearchPlan = None) -> dict:
+        """Execute searches across multiple domains (concurrently, merged with the plan's other requests)."""
+        plan = plan or SearchPlan()
+        requests = {}
+        for domain, config in SEARCH_CONFIG.items():
+            if domain == "style" and style_priority:
+                # For style, also search with priority keywords
+                priority_query = " ".join(style_priority[:2]) if style_priority else query
+                combined_query = f"{query} {priority_query}"
+                requests[domain] = (combined_query, domain, config["max_results"])
+            else:
+                requests[domain] = (query, domain, config["max_results"])
+            plan.add(*requests[domain])
+        plan.run()
+        return {domain: plan.get(*request) for domain, request in requests.items()}
+
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        return self.reasoning.rule(category)
+
+    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
+        """Apply reasoning rules to search results."""
+        return self.reasoning.apply(category)
+
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
         if not results:
@@ -160,22 +307,36 @@ class DesignSystemGenerator:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
-    def generate(self, query: str, project_name: str = None) -> dict:
-        """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
-        product_results = product_result.get("results", [])
+    def generate(self, query: str, project_name: str = None, plan: SearchPlan = None) -> dict:
+        """
+        Generate complete design system recommendation.
+
+        plan may already hold other searches (e.g. page overrides, see _plan_pages);
+        they are fetched in the same round as the searches that do not depend on
+        the reasoning rules.
+        """
+        plan = plan or SearchPlan()
+
+        # Step 1: Search product (for the category) and every domain whose query
+        # does not depend on the reasoning rules
+        for domain, config in SEARCH_CONFIG.items():
+            if domain != "style":
+                plan.add(query, domain, config["max_results"])
+        with TIMINGS.span("design/search"):
+            plan.run()
+        product_results = plan.get(query, "product", SEARCH_CONFIG["product"]["max_results"]).get("results", [])
         category = "General"
         if product_results:
             category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
+        with TIMINGS.span("design/reasoning"):
+            reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Multi-domain search with style priority hints (only style is left to fetch)
+        with TIMINGS.span("design/search"):
+            search_results = self._multi_domain_search(query, style_priority, plan)
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -236,6 +397,20 @@ class DesignSystemGenerator:
         }
 
 
+@functools.lru_cache(maxsize=1)
+def _shared_generator():
+    return DesignSystemGenerator()
+
+
+def _generator():
+    """Process-wide generator, recreated only when the reasoning CSV changes"""
+    generator = _shared_generator()
+    if generator.reasoning is not load_reasoning():
+        _shared_generator.cache_clear()
+        generator = _shared_generator()
+    return generator
+
+
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
@@ -460,46 +635,115 @@ def format_markdown(design_system: dict) -> str:
 
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page=None, output_dir: str = None) -> str:
     """
     Main entry point for design system generation.
 
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
-        output_format: "ascii" (default) or "markdown"
+        output_format: "ascii" (default), "markdown" or "json" (the raw design system dict)
         persist: If True, save design system to design-system/ folder
-        page: Optional page name for page-specific override file
+        page: Optional page name, or list of page names, for page-specific override files
         output_dir: Optional output directory (defaults to current working directory)
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
+    with TIMINGS.span("design/load_reasoning"):
+        generator = _generator()
+    plan = _plan_pages(page, query) if persist else SearchPlan()
+    design_system = generator.generate(query, project_name, plan)
     
     # Persist to files if requested
     if persist:
-        persist_design_system(design_system, page, output_dir, query)
+        persist_design_system(design_system, page, output_dir, query, plan)
+
+    return _render(design_system, output_format)
+
+
+def _render(design_system: dict, output_format: str) -> str:
+    """Format a design system dict as ascii, markdown or json"""
+    with TIMINGS.span(f"format/{output_format}"):
+        if output_format == "json":
+            return json.dumps(design_system, indent=2, ensure_ascii=False)
+        if output_format == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
+
+
+def _generate_item(item, defaults: dict) -> dict:
+    """One generate_design_systems item; failures are returned as {"error"} instead of raised"""
+    item = dict(defaults, **item) if isinstance(item, dict) else dict(defaults, query=item)
+    query = item.get("query")
+    result = {"query": query, "project_name": item.get("project_name")}
+    try:
+        if not isinstance(query, str):
+            raise ValueError("expected a query string or an object with a \"query\"")
+        with TIMINGS.span("design/load_reasoning"):
+            generator = _generator()
+        plan = _plan_pages(item.get("page"), query) if item.get("persist") else SearchPlan()
+        design_system = generator.generate(query, item.get("project_name"), plan)
+        if item.get("persist"):
+            persisted = persist_design_system(design_system, item.get("page"), item.get("output_dir"), query, plan)
+            result["files"] = persisted["created_files"]
+            result["skipped"] = persisted["skipped_files"]
+        result["output"] = _render(design_system, item.get("format", "ascii"))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def generate_design_systems(queries: list, output_format: str = "ascii", persist: bool = False,
+                            page=None, output_dir: str = None, mode: str = None, workers: int = None) -> list:
+    """
+    Generate design systems for many projects on a worker pool (see core.fan_out).
+
+    Args:
+        queries: Query strings, or dicts with "query" and optionally "project_name",
+            "format", "persist", "page" and "output_dir" (overriding the arguments below)
+        output_format, persist, page, output_dir: Defaults for every item, as in generate_design_system
+        mode, workers: fan_out mode ("thread", "process" or "serial") and pool size
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    Returns:
+        One dict per item, in input order: {"query", "project_name", "output"} plus "files"
+        and the unchanged, not rewritten "skipped" subset when persisted, or {"query", "project_name", "error"} when that item failed
+    """
+    defaults = {"format": output_format, "persist": persist, "page": page, "output_dir": output_dir}
+    calls = [(item, defaults) for item in queries]
+    if not calls:
+        return []
+    # Process workers fork from this process: run the first item here so they
+    # start with its warm indexes and reasoning rules instead of each loading
+    # them. Its own searches must not fan out to the pool (which would fork
+    # while this process is still cold), so it runs as a fan_out worker does,
+    # with nested fan_outs serial.
+    if (mode or core.PARALLEL_MODE) == "process":
+        return [core._pooled_call(_generate_item, calls[0])] + fan_out(_generate_item, calls[1:], mode, workers)
+    return fan_out(_generate_item, calls, mode, workers)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+def persist_design_system(design_system: dict, page=None, output_dir: str = None, page_query: str = None,
+                          plan: SearchPlan = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
     
     Args:
         design_system: The generated design system dictionary
-        page: Optional page name for page-specific override file
+        page: Optional page name, or list of page names, for page-specific override files
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        plan: Optional SearchPlan the override searches were already planned in
+    
+    Files whose content on disk (ignoring the "Generated:" timestamp) already
+    matches are left untouched; changed or hand-edited files are replaced
+    atomically. design-system/<project>/.manifest.json records each file's hash
+    with its size and mtime, so files whose stat is unchanged are not re-read.
     
     Returns:
-        dict with created file paths and status
+        dict with status and file paths: all of them ("created_files"), and those
+        rewritten ("written_files") or left unchanged ("skipped_files")
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
@@ -511,34 +755,134 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     pages_dir = design_system_dir / "pages"
     
     created_files = []
+    written_files = []
+    skipped_files = []
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
     pages_dir.mkdir(parents=True, exist_ok=True)
     
+    manifest_file = design_system_dir / MANIFEST_FILE
+    manifest = _read_manifest(manifest_file)
+    entries = dict(manifest)
+
+    def write(path, content):
+        # Unchanged content (ignoring the Generated timestamp) keeps the file and its mtime
+        name = path.relative_to(design_system_dir).as_posix()
+        digest = _content_hash(content)
+        created_files.append(str(path))
+        try:
+            stat = path.stat()
+        except OSError:
+            stat = None
+        if stat is not None:
+            entry = entries.get(name)
+            # The recorded hash stands for the file only while its size and mtime do
+            if entry and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+                on_disk = entry["sha256"]
+            else:
+                on_disk = _file_hash(path)
+            if on_disk == digest:
+                entries[name] = _manifest_entry(digest, stat)
+                skipped_files.append(str(path))
+                return
+        with TIMINGS.span("persist/write"):
+            _write_atomic(path, content)
+        entries[name] = _manifest_entry(digest, path.stat())
+        written_files.append(str(path))
+    
     master_file = design_system_dir / "MASTER.md"
     
-    # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
+    # Generate and write MASTER.md (once, however many pages follow)
+    with TIMINGS.span("format/master_md"):
+        master_content = format_master_md(design_system)
+    write(master_file, master_content)
     
-    # If page is specified, create page override file with intelligent content
-    if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+    # Page override files with intelligent content: the override searches of
+    # all pages run in one planned round, then the pages are formatted concurrently
+    page_files = {}
+    for name in _page_names(page):
+        page_files.setdefault(pages_dir / f"{name.lower().replace(' ', '-')}.md", name)
+    plan = _plan_pages(list(page_files.values()), page_query, plan)
+    with TIMINGS.span("persist/override_search"):
+        plan.run()
+    with TIMINGS.span("format/page_md"):
+        page_contents = fan_out(format_page_override_md, [
+            (design_system, name, page_query, plan) for name in page_files.values()
+        ])
+    for page_file, page_content in zip(page_files, page_contents):
+        write(page_file, page_content)
+
+    if entries != manifest:
+        _write_atomic(manifest_file, json.dumps(entries, indent=2, sort_keys=True) + "\n")
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "written_files": written_files,
+        "skipped_files": skipped_files
+    }
+
+
+def _content_hash(content: str) -> str:
+    """sha256 of rendered content without its "Generated:" timestamp line"""
+    import hashlib
+    lines = [line for line in content.splitlines() if not line.lstrip("> ").startswith("**Generated:**")]
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def _file_hash(path: Path) -> str:
+    """_content_hash of a file on disk (None if unreadable)"""
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return _content_hash(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _manifest_entry(digest: str, stat: os.stat_result) -> dict:
+    """Manifest record of a file: its content hash and the stat it was taken at"""
+    return {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_manifest(path: Path) -> dict:
+    """{relative path: manifest entry} of a project folder; missing, unreadable or malformed entries are left out"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    return {
+        name: entry for name, entry in manifest.items()
+        if isinstance(entry, dict) and isinstance(entry.get("sha256"), str)
+        and isinstance(entry.get("size"), int) and isinstance(entry.get("mtime_ns"), int)
     }
 
 
+def _write_atomic(path: Path, content: str):
+    """Write through a temp file in the same folder and rename it over path, so readers never see a partial file"""
+    import threading
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def read_page_manifest(path: str) -> list:
+    """Page names from a manifest file: one per line, blank lines and # comments ignored"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
     project = design_system.get("project_name", "PROJECT")
@@ -802,14 +1146,14 @@ def format_master_md(design_system: dict) -> str:
     return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None, plan: SearchPlan = None) -> str:
     """Format a page-specific override file with intelligent AI-generated content."""
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system, plan)
     
     lines = []
     
@@ -911,23 +1255,24 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
     return "\n".join(lines)
 
 
-def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
+def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict, plan: SearchPlan = None) -> dict:
     """
     Generate intelligent overrides based on page type using layered search.
     
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
-    
     page_lower = page_name.lower()
     query_lower = (page_query or "").lower()
     combined_context = f"{page_lower} {query_lower}"
     
-    # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    # Search across multiple domains for page-specific guidance (already
+    # fetched when the plan came from persist_design_system)
+    requests = _override_searches(page_name, page_query)
+    plan = _plan_pages(page_name, page_query, plan)
+    with TIMINGS.span("persist/override_search"):
+        plan.run()
+    style_search, ux_search, landing_search = [plan.get(*request) for request in requests]
     
     # Extract results from search response
     style_results = style_search.get("results", [])
@@ -3,22 +3,92 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py --build-index [DIR]
+       python search.py --warm [--parallel process|thread|serial]
+       python search.py --batch queries.jsonl [--domain <domain>] [--stack <stack>]
+       python search.py --serve [--socket <path>]
+       python search.py --client "<query>" [...same options...] [--socket <path>]
        python search.py "<query>" --design-system [-p "Project Name"]
-       python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard" --page ...]
+       python search.py --design-system --batch projects.jsonl [--persist] [--format markdown]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
+         all  (every domain and stack, scored in one pass over a federated index;
+               top-k per domain, or one global top-k with --merged)
 Stacks: html-tailwind, react, nextjs
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
-  --page       Also create a page-specific override file in design-system/pages/
+  --page       Also create a page-specific override file in design-system/pages/ (repeat
+               for more pages; MASTER.md is written once and the pages are generated concurrently)
+  --page-manifest  File of page names, one per line (# comments allowed), added to --page
+  Files whose content on disk is unchanged apart from the "Generated:" timestamp are not
+  rewritten (hashes, sizes and mtimes are kept in design-system/<project>/.manifest.json);
+  changed or hand-edited files are replaced atomically through a temp file and rename.
+
+Batch mode:
+  --batch      Read one request per line ("query" string or {"query", "domain", "stack",
+               "max_results"} object; "-" for stdin) and print one JSON result per line,
+               in input order. --domain/--stack/--max-results are defaults for each line.
+               With --design-system each line is a project ("query" string or {"query",
+               "project_name", "page", "output_dir", ...} object): the design systems are
+               generated on a worker pool (--parallel) and printed in input order; a failed
+               project is reported without stopping the others (exit code 1).
+
+Daemon mode (see daemon.py for the request protocol):
+  --serve      Keep indexes warm and answer JSON-lines requests on stdin/stdout, or on
+               a Unix domain socket with --socket
+  --client     Forward the command to a daemon on --socket (default $UIPRO_SOCKET);
+               runs in-process when no daemon is listening
+
+Parallelism:
+  --parallel   thread (default), process or serial: how the independent per-domain searches
+               of --design-system and --page run; UIPRO_PARALLEL / UIPRO_WORKERS set the
+               default mode and pool size
+
+Timings:
+  --timings    Print time spent per stage (index/csv_load, index/fit, search/score,
+               design/reasoning, format/*, persist/write, ...) to stderr; with --json
+               the same data is added to the output as a "timings" object
+
+Startup cost:
+  --startup-report  Run the command under `python -X importtime` and print the slowest
+                    top-level imports and total wall time to stderr
+
+Index cache:
+  Fitted BM25 indexes are cached in ~/.cache/ui-ux-pro-max ($XDG_CACHE_HOME is honoured).
+  Set UIPRO_CACHE_DIR to relocate the cache, or to an empty string to disable it.
+  Edited CSVs are picked up automatically (also by a running --serve daemon): unchanged
+  rows keep their postings and only new or edited rows are re-tokenized; a changed
+  header triggers a full rebuild.
+  --build-index [DIR]  Write memory-mapped binary indexes for every data file to DIR
+                       (default $UIPRO_INDEX_DIR or <cache dir>/bin). Once built they are
+                       opened without parsing, shared between processes through the page
+                       cache, and rewritten automatically when their CSV changes.
+
+Warm-up:
+  --warm       Build (or load) the index of every domain and stack CSV on a process pool,
+               leaving them in the index cache, and load ui-reasoning.csv; prints build
+               time, documents, vocabulary size and index bytes per file (--json for
+               deploy hooks). --parallel thread/serial overrides the pool; with the
+               cache disabled (UIPRO_CACHE_DIR empty) threads are used.
+
+Result cache:
+  search() and stack results are cached per (domain/stack, query tokens, max results, CSV
+  version). UIPRO_RESULT_CACHE_SIZE sets the entry count (0 disables), UIPRO_RESULT_CACHE_TTL
+  an expiry in seconds, and UIPRO_RESULT_CACHE_PERSIST=1 keeps the cache in the cache dir
+  between runs. Counters are in the daemon's {"op": "stats"} response.
+
+BM25 backend:
+  UIPRO_BM25_BACKEND=numpy scores with NumPy/SciPy sparse matrices (falls back to the
+  pure-Python engine when they are not installed).
 """
 
-import argparse
 import sys
 import io
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+
+# Subcommands import only what they use (core, design_system, daemon, json) so
+# cold starts stay cheap; see --startup-report.
 
 # Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -31,6 +101,8 @@ def format_output(result):
     """Format results for Claude consumption (token-optimized)"""
     if "error" in result:
         return f"Error: {result['error']}"
+    if "facets" in result:
+        return _format_facets(result)
 
     output = []
     if result.get("stack"):
@@ -39,76 +111,411 @@ def format_output(result):
     else:
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
+    if result['domain'] == "all":  # merged --domain all: each row names its source
+        output.append(f"**Source:** all domains and stacks | **Found:** {result['count']} results\n")
+        for i, hit in enumerate(result['results'], 1):
+            _format_row(output, f"### Result {i} ({hit['source']}, {hit['file']})", hit['row'])
+        return "\n".join(output)
     output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
 
     for i, row in enumerate(result['results'], 1):
-        output.append(f"### Result {i}")
-        for key, value in row.items():
-            value_str = str(value)
-            if len(value_str) > 300:
-                value_str = value_str[:300] + "..."
-            output.append(f"- **{key}:** {value_str}")
-        output.append("")
+        _format_row(output, f"### Result {i}", row)
 
     return "\n".join(output)
 
 
-if __name__ == "__main__":
+def _format_row(output, heading, row):
+    """Append one result row as a heading plus truncated key/value bullets"""
+    output.append(heading)
+    for key, value in row.items():
+        value_str = str(value)
+        if len(value_str) > 300:
+            value_str = value_str[:300] + "..."
+        output.append(f"- **{key}:** {value_str}")
+    output.append("")
+
+
+def _format_facets(result):
+    """Format a per-domain --domain all result: one section per domain/stack with matches"""
+    output = [
+        f"## UI Pro Max Search Results",
+        f"**Domain:** all | **Query:** {result['query']}",
+        f"**Source:** {len(result['facets'])} files with matches | **Found:** {result['count']} results\n",
+    ]
+    for facet in result['facets']:
+        name = f"stack {facet['stack']}" if facet.get("stack") else facet['domain']
+        output.append(f"### {name} ({facet['file']}, {facet['count']} results)\n")
+        for i, row in enumerate(facet['results'], 1):
+            _format_row(output, f"#### Result {i}", row)
+    return "\n".join(output)
+
+
+def _read_batch(path):
+    """Parse a JSON-lines batch file into request dicts (invalid lines become errors)"""
+    import json
+    import contextlib
+    # stdin is read but left open: the daemon and callers of main() still own it
+    handle = contextlib.nullcontext(sys.stdin) if path == "-" else open(path, 'r', encoding='utf-8')
+    requests = []
+    with handle as lines:
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                requests.append({"error": f"Line {line_no}: invalid JSON ({e.msg})"})
+                continue
+            if isinstance(item, str):
+                item = {"query": item}
+            if not isinstance(item, dict) or not isinstance(item.get("query"), str):
+                item = {"error": f"Line {line_no}: expected a query string or an object with a \"query\""}
+            requests.append(item)
+    return requests
+
+
+def run_batch(path, domain=None, stack=None, max_results=None):
+    """Run a batch file grouped by (stack, domain, max_results); returns results in input order"""
+    from collections import defaultdict
+    from core import CSV_CONFIG, MAX_RESULTS, search_many, search_stack_many
+
+    max_results = MAX_RESULTS if max_results is None else max_results
+    requests = _read_batch(path)
+    results = [None] * len(requests)
+    groups = defaultdict(list)
+    for pos, item in enumerate(requests):
+        if "error" in item:
+            results[pos] = item
+            continue
+        item_stack = item.get("stack", stack)
+        item_domain = item.get("domain", domain)
+        if item_domain is not None and item_domain not in CSV_CONFIG and item_domain != "all":
+            results[pos] = {"error": f"Unknown domain: {item_domain}", "query": item["query"]}
+            continue
+        item_max = item.get("max_results", max_results)
+        if not isinstance(item_max, int):
+            results[pos] = {"error": f"Invalid max_results: {item_max!r}", "query": item["query"]}
+            continue
+        groups[(item_stack, item_domain, item_max)].append(pos)
+
+    for (group_stack, group_domain, group_max), positions in groups.items():
+        queries = [requests[pos]["query"] for pos in positions]
+        if group_stack:
+            group_results = search_stack_many(queries, group_stack, group_max)
+        else:
+            group_results = search_many(queries, group_domain, group_max)
+        for pos, result in zip(positions, group_results):
+            results[pos] = result
+    return results
+
+
+def _pages(args):
+    """Page names from --page and --page-manifest"""
+    pages = list(args.page or [])
+    if args.page_manifest:
+        from design_system import read_page_manifest
+        pages += read_page_manifest(args.page_manifest)
+    return pages
+
+
+def run_design_batch(args):
+    """Generate a design system per project line of --batch; returns 1 if any project failed"""
+    import json
+    from design_system import generate_design_systems
+
+    requests = _read_batch(args.batch)
+    items = [item for item in requests if "error" not in item]
+    if args.json:  # the per-line "format" is moot: the whole design system dict is printed
+        items = [dict(item, format="json") for item in items]
+    generated = iter(generate_design_systems(
+        items,
+        "json" if args.json else args.format,
+        persist=args.persist,
+        page=_pages(args),
+        output_dir=args.output_dir
+    ))
+    failed = False
+    for item in requests:
+        result = item if "error" in item else next(generated)
+        failed = failed or "error" in result
+        if args.json:
+            if "output" in result:
+                result = dict(result, output=json.loads(result["output"]))
+            print(json.dumps(result, ensure_ascii=False))
+        elif "error" in result:
+            label = f" {result['query']!r}" if result.get("query") else ""
+            print(f"❌ Design system{label} failed: {result['error']}\n")
+        else:
+            print(result["output"])
+            skipped = set(result.get("skipped", []))
+            for path in result.get("files", []):
+                print(f"   📄 {path}{' (unchanged)' if path in skipped else ''}")
+            print("")
+    return 1 if failed else 0
+
+
+def _option_value(argv, option):
+    """Value of a --option given as "--option value" or "--option=value", without argparse"""
+    for i, arg in enumerate(argv):
+        if arg == option and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith(option + "="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def startup_report(argv, top=15):
+    """
+    Re-run argv under `python -X importtime` and summarize where cold-start time goes.
+
+    The command's own output passes through unchanged; the report goes to stderr.
+    """
+    import os
+    import subprocess
+    import time
+
+    cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__)] + list(argv)
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    wall = time.perf_counter() - start
+    sys.stdout.write(proc.stdout.decode("utf-8", "replace"))
+
+    imports = []  # (self_us, cumulative_us, depth, module)
+    other_stderr = []
+    for line in proc.stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:"):
+            other_stderr.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # column header
+        name = fields[2].rstrip()
+        imports.append((int(fields[0]), int(fields[1]), (len(name) - len(name.lstrip())) // 2, name.strip()))
+
+    top_level = [entry for entry in imports if entry[2] == 0]
+    total_us = sum(entry[1] for entry in top_level)
+    report = [
+        "",
+        "## Startup Report",
+        f"Wall time: {wall * 1000:.1f} ms | Imports: {total_us / 1000:.1f} ms across {len(imports)} modules",
+        "",
+        f"{'cumulative ms':>14} {'self ms':>9}  module",
+    ]
+    for self_us, cumulative_us, _, name in sorted(top_level, key=lambda e: e[1], reverse=True)[:top]:
+        report.append(f"{cumulative_us / 1000:>14.2f} {self_us / 1000:>9.2f}  {name}")
+    sys.stderr.write("\n".join(other_stderr + report) + "\n")
+    return proc.returncode
+
+
+def build_index(index_dir=None, as_json=False, timings=None):
+    """Write binary indexes for all data files and print a summary"""
+    from pathlib import Path
+    import core
+    index_dir = index_dir or core.INDEX_DIR
+    if index_dir is None:
+        sys.exit("Error: no index directory (caching is disabled); pass --build-index DIR or set UIPRO_INDEX_DIR")
+    summaries = core.build_binary_indexes(index_dir)
+    if as_json:
+        _print_json({"index_dir": str(index_dir), "indexes": summaries}, timings)
+        return
+
+    print(f"## Binary indexes in {index_dir}")
+    print(f"{'file':<24} {'docs':>6} {'terms':>6} {'bytes':>9}")
+    for summary in summaries:
+        print(f"{summary['file']:<24} {summary['docs']:>6} {summary['terms']:>6} {summary['bytes']:>9}")
+    if core.INDEX_DIR is None or Path(index_dir).resolve() != Path(core.INDEX_DIR).resolve():
+        print(f"\nSet UIPRO_INDEX_DIR={index_dir} so searches use these indexes.")
+
+
+def warm(mode=None, as_json=False, timings=None):
+    """Build every index in parallel (see core.warm_all) and print per-file summaries"""
+    import time
+    from core import warm_all
+    from design_system import warm_reasoning
+
+    start = time.perf_counter()
+    summaries = warm_all(mode or "process") + [warm_reasoning()]
+    wall_ms = (time.perf_counter() - start) * 1000
+    if as_json:
+        _print_json({"wall_ms": wall_ms, "indexes": summaries}, timings)
+        return
+
+    print(f"## Warmed {len(summaries)} files in {wall_ms:.1f} ms")
+    print(f"{'file':<28} {'ms':>8} {'docs':>6} {'terms':>6} {'bytes':>9}")
+    for summary in summaries:
+        size = summary['bytes'] if summary['bytes'] is not None else "-"
+        print(f"{summary['file']:<28} {summary['ms']:>8.1f} {summary['docs']:>6} {summary['terms']:>6} {size:>9}")
+
+
+def build_parser():
+    """Argument parser shared by the CLI and the daemon's argv requests"""
+    import argparse
+    from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS
+
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()) + ["all"], help="Search domain (\"all\": every domain and stack in one pass)")
+    parser.add_argument("--merged", action="store_true", help="With --domain all, return one global top-k instead of top-k per domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--batch", type=str, default=None, help="JSON-lines file of search requests, or of projects with --design-system ('-' for stdin)")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
     # Persistence (Master + Overrides pattern)
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
-    parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
+    parser.add_argument("--page", type=str, action="append", default=None, help="Create page-specific override file in design-system/pages/ (repeat for more pages)")
+    parser.add_argument("--page-manifest", type=str, default=None, help="File of page names, one per line, to create override files for")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    # Daemon mode
+    parser.add_argument("--serve", action="store_true", help="Run as a daemon answering JSON-lines requests (stdin/stdout, or --socket)")
+    parser.add_argument("--socket", type=str, default=None, help="Unix domain socket for --serve/--client (default: $UIPRO_SOCKET or a per-user temp path)")
+    parser.add_argument("--client", action="store_true", help="Forward this command to a running daemon, or run in-process if none is running")
+    parser.add_argument("--parallel", choices=["thread", "process", "serial"], default=None,
+                        help="How design-system searches fan out (default: $UIPRO_PARALLEL or thread)")
+    parser.add_argument("--timings", action="store_true", help="Report time per stage (CSV load, fit, scoring, reasoning, formatting, writes); added to --json output as \"timings\"")
+    parser.add_argument("--build-index", nargs="?", const="", default=None, metavar="DIR",
+                        help="Write memory-mapped binary indexes for every data file (default dir: $UIPRO_INDEX_DIR or <cache dir>/bin)")
+    parser.add_argument("--warm", action="store_true", help="Build every index in parallel (process pool) and report per-file build time, docs, vocabulary and bytes")
+    parser.add_argument("--startup-report", action="store_true", help="Run the command and report per-module import cost (like python -X importtime)")
+    return parser
+
+
+def main(argv=None):
+    """Run the CLI with argv (defaults to sys.argv[1:]); returns the exit code"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # Handled before argparse/core are imported: both only re-dispatch argv
+    if "--startup-report" in argv:
+        return startup_report([arg for arg in argv if arg != "--startup-report"])
+    if "--client" in argv:
+        import daemon
+        forwarded = [arg for arg in argv if arg != "--client"]
+        if _option_value(argv, "--batch") == "-":  # the daemon cannot read this process's stdin
+            return main(forwarded)
+        exit_code = daemon.forward(forwarded, _option_value(argv, "--socket"))
+        if exit_code is not None:
+            return exit_code
+        return main(forwarded)
 
-    args = parser.parse_args()
+    parser = build_parser()
+    args = parser.parse_args(argv)
 
-    # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(
-            args.query, 
-            args.project_name, 
-            args.format,
+    if args.serve:
+        import daemon
+        if args.socket:
+            daemon.serve_socket(args.socket, main)
+        else:
+            daemon.serve_stdio(main)
+        return 0
+
+    if args.query is None and not args.batch and args.build_index is None and not args.warm:
+        parser.error("the query argument is required unless --batch, --build-index or --warm is given")
+
+    if args.parallel:  # restored below, so a daemon's argv request does not change its default
+        import core
+        saved_mode, core.PARALLEL_MODE = core.PARALLEL_MODE, args.parallel
+
+    timings = None
+    if args.timings:
+        from core import TIMINGS
+        timings = TIMINGS
+        timings.reset()
+        timings.enabled = True
+    try:
+        exit_code = _run_command(args, timings)
+    finally:
+        if timings:
+            timings.enabled = False
+        if args.parallel:
+            core.PARALLEL_MODE = saved_mode
+    if timings and not (args.json and not args.batch):
+        sys.stderr.write(timings.format_table() + "\n")
+    return exit_code or 0
+
+
+def _print_json(result, timings, indent=2):
+    """Print a JSON result, adding the "timings" object when --timings is on"""
+    import json
+    if timings:
+        result = dict(result, timings=timings.as_dict())
+    print(json.dumps(result, indent=indent, ensure_ascii=False))
+
+
+def _run_command(args, timings=None):
+    """Dispatch parsed arguments to index building, batch, design-system, stack or domain search; returns the exit code"""
+    # Binary index build
+    if args.build_index is not None:
+        build_index(args.build_index or None, args.json, timings)
+    # Parallel warm-up
+    elif args.warm:
+        warm(args.parallel, args.json, timings)
+    # Batch design systems
+    elif args.batch and args.design_system:
+        return run_design_batch(args)
+    # Batch search
+    elif args.batch:
+        import json
+        for result in run_batch(args.batch, args.domain, args.stack, args.max_results):
+            print(json.dumps(result, ensure_ascii=False))
+    # Design system
+    elif args.design_system:
+        import os
+        from design_system import generate_design_systems
+        result, = generate_design_systems(
+            [{"query": args.query, "project_name": args.project_name}],
+            "json" if args.json else args.format,
             persist=args.persist,
-            page=args.page,
+            page=_pages(args),
             output_dir=args.output_dir
         )
-        print(result)
+        if "error" in result:
+            sys.stderr.write(f"❌ Design system failed: {result['error']}\n")
+            return 1
+        if args.json:
+            import json
+            _print_json(json.loads(result["output"]), timings)
+            return
+        print(result["output"])
         
-        # Print persistence confirmation
+        # Print persistence confirmation (unchanged files are not rewritten)
         if args.persist:
-            project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
+            base_dir = args.output_dir or os.getcwd()
+            master_file, *page_files = [os.path.relpath(path, base_dir) for path in result["files"]]
+            skipped = {os.path.relpath(path, base_dir) for path in result["skipped"]}
+            project_dir = os.path.dirname(master_file)
             print("\n" + "=" * 60)
-            print(f"✅ Design system persisted to design-system/{project_slug}/")
-            print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
-            if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
-                print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
+            print(f"✅ Design system persisted to {project_dir}/")
+            print(f"   📄 {master_file} (Global Source of Truth{', unchanged' if master_file in skipped else ''})")
+            for page_file in page_files:
+                print(f"   📄 {page_file} (Page Overrides{', unchanged' if page_file in skipped else ''})")
             print("")
-            print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
+            print(f"📖 Usage: When building a page, check {project_dir}/pages/[page].md first.")
             print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
             print("=" * 60)
     # Stack search
     elif args.stack:
+        from core import search_stack
         result = search_stack(args.query, args.stack, args.max_results)
         if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            _print_json(result, timings)
         else:
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        from core import search, search_all
+        if args.domain == "all":
+            result = search_all(args.query, args.max_results, merged=args.merged)
+        else:
+            result = search(args.query, args.domain, args.max_results)
         if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            _print_json(result, timings)
         else:
             print(format_output(result))
+
+
+if __name__ == "__main__":
+    sys.exit(main())